@@ -1,70 +1,120 @@
 import sqlite3
+import sys
+import threading
+import types
 
-# Подключаемся к базе данных
-conn = sqlite3.connect('pb.db')
-cursor = conn.cursor()
-
-# Все плиты из кода visualize_kz_plan.py с указанием ширины и правильных кодов нагрузки
-plates_info = [
-    (34, 12, 'ПБ 34-12-8п (3.39м)', 2, 1.2),  # PLATES_1_2 = [3.39]*2
-    (66, 6, 'ПБ 66-6-8п (6.63м)', 4, 0.32),   # PLATES_0_32 = [6.63]*4 (используем нагрузку 6)
-    (78, 6, 'ПБ 78-6-8п (7.83м)', 3, 0.32),   # PLATES_0_32 = [7.83]*3 (используем нагрузку 6)
-    (56, 6, 'ПБ 56-6-8п (5.63м)', 5, 0.72),   # PLATES_0_72 = [5.63]*5 (используем нагрузку 6)
-    (47, 6, 'ПБ 47-6-8п (4.65м)', 5, 0.70),   # PLATES_0_70 = [4.65]*5 (используем нагрузку 6)
-    (68, 6, 'ПБ 68-6-8п (6.75м)', 2, 0.86),   # PLATES_0_86 = [6.75]*2 (используем нагрузку 6)
-    (47, 6, 'ПБ 47-6-8п (4.65м)', 5, 0.86),   # PLATES_0_86 = [4.65]*5 (используем нагрузку 6)
+import numpy as np
+
+_INV_1_2 = 1.0 / 1.2
+_KG_PER_DM_M = 2500.0  # 10 (дм -> м) * 250 кг/м²
+CUT_PRICE_PER_M = 460  # руб/пог.м за продольный рез
+
+
+# Все плиты из кода visualize_kz_plan.py с указанием ширины и правильных кодов нагрузки.
+# Храним по столбцам (параллельные списки): i-й элемент каждого списка - одна позиция.
+#   PLATES_1_2  = [3.39]*2
+#   PLATES_0_32 = [6.63]*4 + [7.83]*3   (используем нагрузку 6)
+#   PLATES_0_72 = [5.63]*5              (используем нагрузку 6)
+#   PLATES_0_70 = [4.65]*5              (используем нагрузку 6)
+#   PLATES_0_86 = [6.75]*2 + [4.65]*5   (используем нагрузку 6)
+LENGTHS_DM = [34, 66, 78, 56, 47, 68, 47]
+LOAD_CODES = [12, 6, 6, 6, 6, 6, 6]
+NAMES = [
+    'ПБ 34-12-8п (3.39м)',
+    'ПБ 66-6-8п (6.63м)',
+    'ПБ 78-6-8п (7.83м)',
+    'ПБ 56-6-8п (5.63м)',
+    'ПБ 47-6-8п (4.65м)',
+    'ПБ 68-6-8п (6.75м)',
+    'ПБ 47-6-8п (4.65м)',
 ]
+QUANTITIES = [2, 4, 3, 5, 5, 2, 5]
+WIDTHS_M = [1.2, 0.32, 0.32, 0.72, 0.70, 0.86, 0.86]
+
+# Деньги считаем в целых копейках, ширину - дробью width_num / 120 (к 1.2м)
+WIDTH_DEN = 120
+
+# Цены нужных кодов нагрузки загружаем в фоне, пока готовятся данные плит
+load_codes = tuple(set(LOAD_CODES))
+price_map = {}
+
+
+def _preload():
+    # Подключаемся к базе данных только для чтения
+    c = sqlite3.connect('file:pb.db?mode=ro&immutable=1', uri=True, cached_statements=256)
+    try:
+        c.execute('PRAGMA mmap_size=268435456')
+        c.execute('PRAGMA cache_size=-65536')
+        c.execute('PRAGMA temp_store=MEMORY')
+        c.execute('PRAGMA query_only=1')
+        # Все чтения выполняем в одной явной транзакции
+        with c:
+            c.execute('BEGIN')
+            sql = 'SELECT length_dm, load_code, price FROM prices WHERE load_code IN ({})'.format(
+                ','.join('?' * len(load_codes)))
+            price_map.update({(l, c2): int(round(p * 100)) for l, c2, p in c.execute(sql, load_codes)})
+    finally:
+        c.close()
+
+
+_loader = threading.Thread(target=_preload)
+_loader.start()
+
+
+def fmt(kop):
+    """Форматирует сумму в копейках как целые рубли с разделителем тысяч"""
+    return f'{(int(kop) + 50) // 100:,}'
+
+
+# Считаем стоимость сразу по всем плитам (векторно), столбцы уже лежат подряд
+lengths_dm = np.asarray(LENGTHS_DM, dtype=np.int64)
+qtys = np.asarray(QUANTITIES, dtype=np.int64)
+widths = np.asarray(WIDTHS_M, dtype=np.float64)
+width_nums = np.rint(widths * 100).astype(np.int64)
+
+_loader.join()
+PRICE_MAP = types.MappingProxyType(price_map)
+prices = [PRICE_MAP.get(key) for key in zip(LENGTHS_DM, LOAD_CODES)]
+found = np.array([v is not None for v in prices], dtype=bool)
+base = np.array([v or 0 for v in prices], dtype=np.int64)
+
+# Цена из БД - это цена за плиту шириной 1.2м, корректируем пропорционально ширине
+width_factors = widths * _INV_1_2
+unit_prices = base * width_nums // WIDTH_DEN
+total_prices = base * width_nums * qtys // WIDTH_DEN
+row_weights = lengths_dm * widths * _KG_PER_DM_M * qtys
+
+# Итоги - суммы построчных массивов по плитам с найденной ценой
+total_cost = int(total_prices[found].sum())
+total_weight = int(round(float(row_weights[found].sum())))
+total_plates = int(qtys[found].sum())
 
-print('=== ВСЕ ПЛИТЫ И ИХ СТОИМОСТЬ ===')
-total_cost = 0
-total_weight = 0
-total_plates = 0
-
-for length_dm, load_code, name, quantity, width_m in plates_info:
-    cursor.execute('SELECT price FROM prices WHERE length_dm = ? AND load_code = ?', (length_dm, load_code))
-    result = cursor.fetchone()
-    
-    if result:
-        # Цена из БД - это цена за плиту шириной 1.2м
-        price_per_unit_1_2m = result[0]
-        
-        # Корректируем цену пропорционально ширине
-        width_factor = width_m / 1.2
-        price_per_unit = price_per_unit_1_2m * width_factor
-        
-        total_price = price_per_unit * quantity
-        
-        # Примерный вес (кг/м² * площадь)
-        area = length_dm * 10 * width_m  # длина * ширина в м²
-        weight_per_unit = area * 250  # примерно 250 кг/м² для ПБ
-        total_weight_for_plates = weight_per_unit * quantity
-        
-        total_cost += total_price
-        total_weight += total_weight_for_plates
-        total_plates += quantity
-        
-        print(f'{name} (ширина {width_m}м): {quantity} шт x {price_per_unit:,.0f} руб = {total_price:,.0f} руб')
-        print(f'  (базовая цена за 1.2м: {price_per_unit_1_2m:,.0f} руб, коэффициент: {width_factor:.2f})')
+# Весь отчёт собираем в один буфер и выводим одной записью
+out = ['=== ВСЕ ПЛИТЫ И ИХ СТОИМОСТЬ ===']
+for i, (name, qty, w) in enumerate(zip(NAMES, QUANTITIES, WIDTHS_M)):
+    if found[i]:
+        out.append(f'{name} (ширина {w}м): {qty} шт x {fmt(unit_prices[i])} руб = {fmt(total_prices[i])} руб')
+        out.append(f'  (базовая цена за 1.2м: {fmt(base[i])} руб, коэффициент: {width_factors[i]:.2f})')
     else:
-        print(f'{name}: ЦЕНА НЕ НАЙДЕНА в базе данных')
+        out.append(f'{name}: ЦЕНА НЕ НАЙДЕНА в базе данных')
 
-print(f'\n=== ИТОГО ===')
-print(f'Всего плит: {total_plates} шт')
-print(f'Общая стоимость: {total_cost:,.0f} руб')
-print(f'Общий вес: {total_weight:,.0f} кг')
-print(f'Средняя цена за плиту: {total_cost/total_plates:,.0f} руб')
+out.append('\n=== ИТОГО ===')
+out.append(f'Всего плит: {total_plates} шт')
+out.append(f'Общая стоимость: {fmt(total_cost)} руб')
+out.append(f'Общий вес: {total_weight:,.0f} кг')
+out.append(f'Средняя цена за плиту: {fmt(total_cost // total_plates)} руб')
 
-# Проверим количество резов
-longitudinal_cuts = 4 + 3 + 5 + 5 + 2 + 5  # все плиты кроме PLATES_1_2
-cuts_cost = longitudinal_cuts * 460  # 460 руб/пог.м за продольный рез
+# Проверим количество резов: по одному на каждую плиту не шириной 1.2м
+longitudinal_cuts = int(qtys[widths != 1.2].sum())
+cuts_cost = longitudinal_cuts * CUT_PRICE_PER_M * 100
 
-print(f'\n=== РЕЗЫ ===')
-print(f'Продольных резов: {longitudinal_cuts} шт')
-print(f'Стоимость резов: {cuts_cost:,.0f} руб')
+out.append('\n=== РЕЗЫ ===')
+out.append(f'Продольных резов: {longitudinal_cuts} шт')
+out.append(f'Стоимость резов: {fmt(cuts_cost)} руб')
 
-print(f'\n=== ОБЩАЯ СТОИМОСТЬ ===')
-print(f'Стоимость плит: {total_cost:,.0f} руб')
-print(f'Стоимость резов: {cuts_cost:,.0f} руб')
-print(f'ИТОГО: {total_cost + cuts_cost:,.0f} руб')
+out.append('\n=== ОБЩАЯ СТОИМОСТЬ ===')
+out.append(f'Стоимость плит: {fmt(total_cost)} руб')
+out.append(f'Стоимость резов: {fmt(cuts_cost)} руб')
+out.append(f'ИТОГО: {fmt(total_cost + cuts_cost)} руб')
 
-conn.close()
+sys.stdout.write('\n'.join(out) + '\n')
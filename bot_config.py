@@ -1,17 +1,79 @@
 import os
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+def _load_env(path):
+    """Читает KEY=VALUE из env-файла в os.environ (уже заданные переменные не трогаем)"""
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line[:1] == b'#' or b'=' not in line:
+                    continue
+                k, _, v = line.partition(b'=')
+                os.environ.setdefault(k.decode().strip(), v.decode().strip().strip('"').strip("'"))
+    except FileNotFoundError:
+        pass
+
+
+# Папка проекта (вычисляем один раз)
+_BASE = Path(__file__).resolve().parent
 
 # Загружаем переменные окружения
-load_dotenv("bot.env")
+_load_env(_BASE / "bot.env")
 
 # Токен бота (получите у @BotFather)
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# Webhook (если WEBHOOK_URL не задан - бот работает через long polling)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")            # например https://example.com/webhook
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+
+# STRICT_DB=1 - проверять схему pb.db при запуске (иначе достаточно наличия файла)
+STRICT_DB = os.getenv("STRICT_DB") == "1"
+
 # Пути к данным (используем существующие папки)
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUTS_DIR = os.path.join(BASE_DIR, "Визуализация_Раскладки")
-PRICES_DIR = os.path.join(BASE_DIR, "банк знаний")
-DB_PATH = os.path.join(BASE_DIR, "pb.db")
+OUTPUTS_PATH = _BASE / "Визуализация_Раскладки"
+PRICES_PATH = _BASE / "банк знаний"
+DB_FILE = _BASE / "pb.db"
+
+# Строковые варианты для обратной совместимости
+BASE_DIR = str(_BASE)
+OUTPUTS_DIR = str(OUTPUTS_PATH)
+PRICES_DIR = str(PRICES_PATH)
+DB_PATH = str(DB_FILE)
 
 # Создаём папку результатов если её нет
-os.makedirs(OUTPUTS_DIR, exist_ok=True)
+OUTPUTS_PATH.mkdir(exist_ok=True)
+
+
+@dataclass(frozen=True, slots=True)
+class _Cfg:
+    """Настройки бота, прочитанные один раз при импорте"""
+    BOT_TOKEN: Optional[str]
+    OUTPUTS_DIR: str
+    PRICES_DIR: str
+    DB_PATH: str
+    WEBHOOK_URL: Optional[str]
+    WEBHOOK_PATH: str
+    WEBHOOK_SECRET: Optional[str]
+    WEBAPP_HOST: str
+    WEBAPP_PORT: int
+    STRICT_DB: bool
+
+
+CFG = _Cfg(
+    BOT_TOKEN, OUTPUTS_DIR, PRICES_DIR, DB_PATH,
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBAPP_HOST, WEBAPP_PORT,
+    STRICT_DB,
+)
+
+__all__ = (
+    "CFG", "BOT_TOKEN", "OUTPUTS_DIR", "PRICES_DIR", "DB_PATH",
+    "OUTPUTS_PATH", "PRICES_PATH", "DB_FILE",
+)
@@ -1,7 +1,14 @@
 import asyncio
+import functools
 import os
+import re
+import shutil
+import sqlite3
+import time
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, Tuple
 
 from aiogram import Router, F
 from aiogram.types import (
@@ -18,6 +25,7 @@ from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from visualization import visualize_plan
 from config_and_data import set_plate_lists_from_text
+import optimization
 from optimization import apply_width_optimization, optimize_with_cascading_longitudinal_cuts
 import config_and_data as cfg
 from bot_config import OUTPUTS_DIR
@@ -27,8 +35,124 @@ from commercial_offer import generate_commercial_offer_pdf
 
 router = Router()
 
-PLANNING_CACHE: Dict[int, Dict[str, Any]] = {}
-ORDER_CACHE: Dict[int, list] = {}  # Кэш для хранения заказов пользователей
+# Группы плит по ширине: (имя списка в config_and_data, ширина в мм)
+PLATE_GROUPS_2D = (
+    ('PLATES_1_2', 1200), ('PLATES_1_08', 1080),  # КРИТИЧНО: Плиты БЕЗ реза!
+    ('PLATES_0_32', 320), ('PLATES_0_46', 460), ('PLATES_0_70', 700),
+    ('PLATES_0_72', 720), ('PLATES_0_86', 860), ('PLATES_0_88', 880),
+    ('PLATES_0_74', 740), ('PLATES_0_48', 480), ('PLATES_0_50', 500),
+    ('PLATES_0_34', 340),
+)
+
+# Группы для коммерческого предложения: (имя списка, ширина в мм, ширина в дм для наименования)
+PLATE_GROUPS_KP = (
+    ('PLATES_1_2', 1200, "12"),
+    ('PLATES_1_08', 1080, "10.8"),
+    ('PLATES_1_0', 1000, "10"),
+    ('PLATES_0_32', 320, "3.2"),
+    ('PLATES_0_46', 460, "4.6"),
+    ('PLATES_0_70', 700, "7"),
+    ('PLATES_0_72', 720, "7.2"),
+    ('PLATES_0_86', 860, "8.6"),
+    ('PLATES_0_88', 880, "8.8"),
+    ('PLATES_0_74', 740, "7.4"),
+    ('PLATES_0_48', 480, "4.8"),
+    ('PLATES_0_50', 500, "5"),
+    ('PLATES_0_34', 340, "3.4"),
+)
+
+# Кэши по user_id ограничены по размеру (LRU), чтобы память не росла с числом пользователей
+CACHE_MAX_USERS = 1000
+PLANNING_CACHE: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+ORDER_CACHE: "OrderedDict[int, list]" = OrderedDict()  # Кэш для хранения заказов пользователей
+MYORDERS_CACHE: "OrderedDict[int, Tuple[float, str]]" = OrderedDict()  # user_id -> (время, готовый ответ /myorders)
+MYORDERS_TTL = 10  # секунд; заказы в этом коде не пишутся, поэтому кэш устаревает только по TTL
+
+# Разделитель тысяч в суммах: "1,234,567" -> "1 234 567"
+_COMMA_TO_SP = str.maketrans({',': ' '})
+
+START_TEXT = (
+    "👋 Привет! Я бот для расчёта и визуализации дорожек ПБ.\n\n"
+    "🔧 Что я умею:\n"
+    "• Строить планы раскладки плит\n"
+    "• Рассчитывать стоимость и отходы\n"
+    "• Оптимизировать раскрой (экономия до 40%)\n"
+    "• Экспортировать результаты в файлы\n\n"
+    "Выберите действие кнопкой ниже или /help для справки"
+)
+
+HELP_TEXT = """
+📖 **Помощь по командам:**
+
+🏗️ **Построить план** - создаёт визуализацию дорожки с расчётом стоимости
+
+**Команды:**
+• `/start` - главное меню
+• `/build_plan` - построить план дорожки
+• `/optimize` - оптимизация раскроя с экономией до 40%
+• `/help` - эта справка
+• `/stats` - статистика проекта
+
+**Форматы файлов:**
+• PNG - схема раскладки
+• PDF - техническая документация  
+• XLSX - ведомость и смета
+• CSV - данные для импорта
+
+💡 **Оптимизация резов:**
+Использует каскадные продольные резы для минимизации отходов и экономии материала.
+    """
+
+# Номер заказа из команды /export_123 (допускается хвост после номера)
+_EXPORT_RE = re.compile(r'^/export_(\d+)\b')
+
+def _cache_set(cache: OrderedDict, key, value, cap: int = CACHE_MAX_USERS):
+    """Кладёт значение в LRU-кэш и вытесняет самую старую запись при переполнении"""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > cap:
+        cache.popitem(last=False)
+
+def _cache_get(cache: OrderedDict, key):
+    """Читает значение из LRU-кэша, отмечая запись как недавно использованную"""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def _length_counts(plates_list: list) -> Dict[float, int]:
+    """Количество плит по длинам; частый случай - все плиты одной длины"""
+    first = plates_list[0]
+    if plates_list.count(first) == len(plates_list):
+        return {first: len(plates_list)}
+    return Counter(plates_list)
+
+# Размер блока чтения при загрузке документов. FSInputFile читает файл через aiofiles,
+# и каждый блок - отдельный переход в пул потоков; по умолчанию блок 64 КБ,
+# крупный блок сокращает число таких переходов для многомегабайтных PDF/XLSX
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _upload(path) -> FSInputFile:
+    """Файл для отправки в Telegram с увеличенным блоком чтения"""
+    return FSInputFile(path, chunk_size=UPLOAD_CHUNK_SIZE)
+
+def _existing(paths) -> list:
+    """Оставляет только существующие файлы (все stat-вызовы за один заход в поток)"""
+    return [p for p in paths if os.path.exists(p)]
+
+async def _send_documents(message: Message, paths) -> None:
+    """Отправляет файлы по порядку; сбой одного файла сообщается пользователю и не обрывает остальные"""
+    for p in paths:
+        try:
+            await message.answer_document(_upload(p))
+        except Exception as e:
+            await message.answer(f"❌ Не удалось отправить {os.path.basename(p)}: {e}")
+
+def _save_buffer(buffer, path: str):
+    """Пишет BytesIO на диск блоками, без лишней копии всего содержимого в памяти"""
+    buffer.seek(0)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(buffer, f, length=1 << 16)
 
 def register_handlers(dp):
     """Регистрируем все обработчики"""
@@ -38,7 +162,9 @@ class KPStates(StatesGroup):
     waiting_for_plate_list = State()
     waiting_for_commercial_offer = State()
 
+@functools.lru_cache(maxsize=1)
 def main_menu_kb() -> ReplyKeyboardMarkup:
+    # Клавиатура неизменна - создаём один раз и переиспользуем во всех ответах
     return ReplyKeyboardMarkup(
         keyboard=[
             [KeyboardButton(text="Получить КП")],
@@ -53,16 +179,7 @@ def main_menu_kb() -> ReplyKeyboardMarkup:
 @router.message(Command("start"))
 async def cmd_start(message: Message):
     """Обработчик команды /start"""
-    await message.answer(
-        "👋 Привет! Я бот для расчёта и визуализации дорожек ПБ.\n\n"
-        "🔧 Что я умею:\n"
-        "• Строить планы раскладки плит\n"
-        "• Рассчитывать стоимость и отходы\n"
-        "• Оптимизировать раскрой (экономия до 40%)\n"
-        "• Экспортировать результаты в файлы\n\n"
-        "Выберите действие кнопкой ниже или /help для справки",
-        reply_markup=main_menu_kb()
-    )
+    await message.answer(START_TEXT, reply_markup=main_menu_kb())
 
 @router.message(F.text == "Получить КП")
 async def btn_get_kp(message: Message, state: FSMContext):
@@ -84,20 +201,14 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
         set_plate_lists_from_text(message.text or "")
         
         # 2) Собираем заказы для 2D оптимизации (длина + ширина)
-        from collections import Counter
         orders_2d = []
         
         # Для каждой ширины группируем плиты по длине
-        for width_mm, plates_list in [
-            (1200, cfg.PLATES_1_2), (1080, cfg.PLATES_1_08),  # КРИТИЧНО: Плиты БЕЗ реза!
-            (320, cfg.PLATES_0_32), (460, cfg.PLATES_0_46), (700, cfg.PLATES_0_70),
-            (720, cfg.PLATES_0_72), (860, cfg.PLATES_0_86), (880, cfg.PLATES_0_88),
-            (740, cfg.PLATES_0_74), (480, cfg.PLATES_0_48), (500, cfg.PLATES_0_50),
-            (340, cfg.PLATES_0_34)
-        ]:
+        for attr, width_mm in PLATE_GROUPS_2D:
+            plates_list = getattr(cfg, attr)
             if plates_list:
                 # Группируем по длине (плиты с одинаковой длиной объединяем)
-                length_counts = Counter(plates_list)
+                length_counts = _length_counts(plates_list)
                 for length, qty in length_counts.items():
                     orders_2d.append({
                         'length': length,
@@ -106,10 +217,9 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
                     })
         
         # Для обратной совместимости сохраняем старый формат (только ширины)
-        orders = {}
+        orders = defaultdict(int)
         for order in orders_2d:
-            width = order['width']
-            orders[width] = orders.get(width, 0) + order['qty']
+            orders[order['width']] += order['qty']
         
         # 3) Запускаем 2D оптимизацию (с учётом длины и ширины)
         optimization_result = None
@@ -118,7 +228,6 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
             for order in orders_2d:
                 print(f"  - {order['qty']}x {order['length']}м × {order['width']}мм")
             try:
-                from optimization import OPT_CASCADING_PLAN, optimize_with_cascading_longitudinal_cuts
                 optimization_result = await asyncio.to_thread(
                     optimize_with_cascading_longitudinal_cuts,
                     orders_2d=orders_2d  # Передаём как именованный параметр для режима 2D
@@ -126,14 +235,13 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
                 print(f"[BOT] Получен результат: {optimization_result}")
                 if optimization_result and optimization_result.get('total_plates', 0) > 0:
                     # Сохраняем результат в глобальную переменную для визуализации
-                    import optimization
                     optimization.OPT_CASCADING_PLAN = optimization_result
                     print(f"[BOT] OK: Результат сохранён в optimization.OPT_CASCADING_PLAN")
                     
                     opt_msg = (
                         "💡 **Результат оптимизации:**\n"
                         f"• Плит потребуется: **{optimization_result['total_plates']} шт**\n"
-                        f"• Стоимость: **{optimization_result['total_cost']:,} ₽**\n".replace(',', ' ') +
+                        f"• Стоимость: **{optimization_result['total_cost']:,} ₽**\n".translate(_COMMA_TO_SP) +
                         f"• Отходы: **{optimization_result.get('waste_width', 0)} мм**\n"
                     )
                     await message.answer(opt_msg, parse_mode="Markdown")
@@ -147,13 +255,8 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
         
         # 5) Запускаем расчёт и визуализацию
         result_paths = await asyncio.to_thread(visualize_plan, OUTPUTS_DIR)
-        if isinstance(result_paths, tuple) and len(result_paths) >= 2:
-            png_path, pdf_path = result_paths
-
-            # Извлекаем timestamp из имени PNG
-            base = os.path.basename(png_path)
-            # Ожидаемый формат: ..._{timestamp}.png
-            timestamp = base.rsplit('_', 1)[-1].replace('.png', '')
+        if isinstance(result_paths, tuple) and len(result_paths) >= 3:
+            png_path, pdf_path, timestamp = result_paths
 
             # Возможные имена доп.файлов (поддерживаем оба варианта из визуализатора)
             candidates = [
@@ -165,13 +268,8 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
 
             await message.answer("✅ Готово! Отправляю файлы:")
 
-            if os.path.exists(png_path):
-                await message.answer_document(FSInputFile(png_path))
-            if os.path.exists(pdf_path):
-                await message.answer_document(FSInputFile(pdf_path))
-            for p in candidates:
-                if os.path.exists(p):
-                    await message.answer_document(FSInputFile(p))
+            paths = await asyncio.to_thread(_existing, [png_path, pdf_path, *candidates])
+            await _send_documents(message, paths)
 
             # Формируем итоговое сообщение
             final_msg = "📋 **Итоги:**\n• Схема раскладки готова\n• Ведомость и смета сформированы"
@@ -183,7 +281,8 @@ async def receive_plate_list_and_build(message: Message, state: FSMContext):
     except Exception as e:
         await message.answer(f"❌ Ошибка: {str(e)}")
     finally:
-        await state.clear()
+        # Данных в FSM нет, set_state(None) равносилен clear()
+        await state.set_state(None)
 
 @router.message(Command("build_plan"))
 async def cmd_build_plan(message: Message):
@@ -194,29 +293,18 @@ async def cmd_build_plan(message: Message):
         # Запускаем расчёт в отдельном потоке
         result_paths = await asyncio.to_thread(visualize_plan, OUTPUTS_DIR)
         
-        if isinstance(result_paths, tuple) and len(result_paths) >= 2:
-            png_path, pdf_path = result_paths
+        if isinstance(result_paths, tuple) and len(result_paths) >= 3:
+            png_path, pdf_path, timestamp = result_paths
             
             # Ищем дополнительные файлы
-            timestamp = os.path.basename(png_path).split('_')[-1].replace('.png', '')
             csv_path = os.path.join(OUTPUTS_DIR, f'Раскладка_Дорожка_1_{timestamp}.csv')
             xlsx_path = os.path.join(OUTPUTS_DIR, f'Ведомость_Дорожка_1_{timestamp}.xlsx')
             
             await message.answer("✅ Готово! Отправляю файлы:")
             
-            # Отправляем изображение как документ, чтобы избежать PHOTO_INVALID_DIMENSIONS
-            if os.path.exists(png_path):
-                await message.answer_document(FSInputFile(png_path))
-            
-            # Отправляем документы
-            if os.path.exists(xlsx_path):
-                await message.answer_document(FSInputFile(xlsx_path))
-            
-            if os.path.exists(pdf_path):
-                await message.answer_document(FSInputFile(pdf_path))
-            
-            if os.path.exists(csv_path):
-                await message.answer_document(FSInputFile(csv_path))
+            # Изображение отправляем как документ, чтобы избежать PHOTO_INVALID_DIMENSIONS
+            paths = await asyncio.to_thread(_existing, [png_path, xlsx_path, pdf_path, csv_path])
+            await _send_documents(message, paths)
             
             await message.answer(
                 "📋 **Результаты расчёта готовы!**\n\n"
@@ -234,35 +322,29 @@ async def cmd_build_plan(message: Message):
 @router.message(Command("help"))
 async def cmd_help(message: Message):
     """Обработчик команды /help"""
-    help_text = """
-📖 **Помощь по командам:**
-
-🏗️ **Построить план** - создаёт визуализацию дорожки с расчётом стоимости
-
-**Команды:**
-• `/start` - главное меню
-• `/build_plan` - построить план дорожки
-• `/optimize` - оптимизация раскроя с экономией до 40%
-• `/help` - эта справка
-• `/stats` - статистика проекта
-
-**Форматы файлов:**
-• PNG - схема раскладки
-• PDF - техническая документация  
-• XLSX - ведомость и смета
-• CSV - данные для импорта
-
-💡 **Оптимизация резов:**
-Использует каскадные продольные резы для минимизации отходов и экономии материала.
-    """
-    await message.answer(help_text, parse_mode="Markdown")
+    await message.answer(HELP_TEXT, parse_mode="Markdown")
+
+def _count_outputs(path: str):
+    """Один проход по папке результатов: (png, pdf, xlsx)"""
+    png = pdf = xlsx = 0
+    with os.scandir(path) as it:
+        for e in it:
+            n = e.name
+            if n.endswith('.png'):
+                png += 1
+            elif n.endswith('.pdf'):
+                pdf += 1
+            elif n.endswith('.xlsx'):
+                xlsx += 1
+    return png, pdf, xlsx
 
 @router.message(Command("stats"))
 async def cmd_stats(message: Message):
     """Обработчик команды /stats"""
     try:
-        # Подсчитываем файлы в папке outputs
-        files_count = len([f for f in os.listdir(OUTPUTS_DIR) if f.endswith(('.png', '.pdf', '.xlsx'))])
+        # Подсчитываем файлы в папке outputs (в отдельном потоке, чтобы не блокировать бота)
+        png, pdf, xlsx = await asyncio.to_thread(_count_outputs, OUTPUTS_DIR)
+        files_count = png + pdf + xlsx
         
         stats_text = f"""
 📊 **Статистика проекта:**
@@ -276,9 +358,9 @@ async def cmd_stats(message: Message):
 • Экспорт в различные форматы
 
 📈 **Последние результаты:**
-• PNG схемы: {len([f for f in os.listdir(OUTPUTS_DIR) if f.endswith('.png')])} шт
-• PDF документы: {len([f for f in os.listdir(OUTPUTS_DIR) if f.endswith('.pdf')])} шт
-• Excel файлы: {len([f for f in os.listdir(OUTPUTS_DIR) if f.endswith('.xlsx')])} шт
+• PNG схемы: {png} шт
+• PDF документы: {pdf} шт
+• Excel файлы: {xlsx} шт
         """
         
         await message.answer(stats_text, parse_mode="Markdown")
@@ -294,27 +376,12 @@ async def cmd_optimize(message: Message):
     
     try:
         # Собираем заказы из текущей конфигурации
-        orders = {}
-        if cfg.PLATES_0_32:
-            orders[320] = len(cfg.PLATES_0_32)
-        if cfg.PLATES_0_46:
-            orders[460] = len(cfg.PLATES_0_46)
-        if cfg.PLATES_0_70:
-            orders[700] = len(cfg.PLATES_0_70)
-        if cfg.PLATES_0_72:
-            orders[720] = len(cfg.PLATES_0_72)
-        if cfg.PLATES_0_86:
-            orders[860] = len(cfg.PLATES_0_86)
-        if cfg.PLATES_0_88:
-            orders[880] = len(cfg.PLATES_0_88)
-        if cfg.PLATES_0_74:
-            orders[740] = len(cfg.PLATES_0_74)
-        if cfg.PLATES_0_48:
-            orders[480] = len(cfg.PLATES_0_48)
-        if cfg.PLATES_0_50:
-            orders[500] = len(cfg.PLATES_0_50)
-        if cfg.PLATES_0_34:
-            orders[340] = len(cfg.PLATES_0_34)
+        # (плиты 1.2м и 1.08м идут без реза и в оптимизации не участвуют)
+        orders = {
+            width_mm: len(plates_list)
+            for attr, width_mm in PLATE_GROUPS_2D
+            if width_mm < 1080 and (plates_list := getattr(cfg, attr))
+        }
         
         if not orders:
             await message.answer(
@@ -329,32 +396,35 @@ async def cmd_optimize(message: Message):
         
         if result and result.get('total_plates', 0) > 0:
             # Формируем красивый ответ
-            response = "✅ **Оптимизация завершена!**\n\n"
-            response += f"📊 **Результат:**\n"
-            response += f"• Плит потребуется: **{result['total_plates']} шт**\n"
-            response += f"• Стоимость: **{result['total_cost']:,} ₽**\n".replace(',', ' ')
-            response += f"• Отходы по ширине: **{result.get('waste_width', 0)} мм**\n\n"
+            # (строки собираем в список и склеиваем один раз)
+            parts = [
+                "✅ **Оптимизация завершена!**\n",
+                "📊 **Результат:**",
+                f"• Плит потребуется: **{result['total_plates']} шт**",
+                f"• Стоимость: **{result['total_cost']:,} ₽**".translate(_COMMA_TO_SP),
+                f"• Отходы по ширине: **{result.get('waste_width', 0)} мм**\n",
+            ]
             
             if result.get('primary_cuts'):
-                response += "🔹 **Первичные резы:**\n"
+                parts.append("🔹 **Первичные резы:**")
                 for cut in result['primary_cuts']:
-                    response += f"  • {cut['qty']} плит → {cut['width']} мм + остаток {cut['rest']} мм\n"
+                    parts.append(f"  • {cut['qty']} плит → {cut['width']} мм + остаток {cut['rest']} мм")
             
             if result.get('secondary_cuts'):
-                response += f"\n🔸 **Вторичные резы (из остатков):**\n"
+                parts.append("\n🔸 **Вторичные резы (из остатков):**")
                 for cut in result['secondary_cuts']:
                     if cut.get('pieces', 1) > 1:
-                        response += f"  • {cut['qty']} остатков {cut['source']} мм → {cut['pieces']} частей по {cut['cuts'][0]} мм\n"
+                        parts.append(f"  • {cut['qty']} остатков {cut['source']} мм → {cut['pieces']} частей по {cut['cuts'][0]} мм")
                     else:
                         cuts_str = ' + '.join(str(c) for c in cut['cuts'])
-                        response += f"  • {cut['qty']} остатков {cut['source']} мм → {cuts_str} мм\n"
+                        parts.append(f"  • {cut['qty']} остатков {cut['source']} мм → {cuts_str} мм")
             
-            response += "\n💡 **Преимущества:**\n"
-            response += "• Минимум плит\n"
-            response += "• Остатки используются повторно\n"
-            response += "• Меньше отходов\n"
+            parts.append("\n💡 **Преимущества:**")
+            parts.append("• Минимум плит")
+            parts.append("• Остатки используются повторно")
+            parts.append("• Меньше отходов\n")
             
-            await message.answer(response, parse_mode="Markdown", reply_markup=main_menu_kb())
+            await message.answer("\n".join(parts), parse_mode="Markdown", reply_markup=main_menu_kb())
         else:
             await message.answer(
                 "❌ Не удалось выполнить оптимизацию.\n"
@@ -386,10 +456,10 @@ async def btn_planning_days_DISABLED(message: Message):
             )
             return
 
-        PLANNING_CACHE[message.from_user.id] = {
+        _cache_set(PLANNING_CACHE, message.from_user.id, {
             "schedule": schedule,
             "report": report_path,
-        }
+        })
 
         # days = available_days(schedule)
         days = []
@@ -398,10 +468,9 @@ async def btn_planning_days_DISABLED(message: Message):
             for day in days
         ]
 
-        summary_lines = [
-            f"День {day}: {sum(1 for t in schedule if t.day == day)} дорожек"
-            for day in days
-        ]
+        # Количество дорожек по дням - за один проход по расписанию
+        counts = Counter(t.day for t in schedule)
+        summary_lines = [f"День {day}: {counts[day]} дорожек" for day in days]
 
         keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -411,7 +480,7 @@ async def btn_planning_days_DISABLED(message: Message):
         )
 
         if report_path and report_path.exists():
-            await message.answer_document(FSInputFile(report_path))
+            await message.answer_document(_upload(report_path))
 
     except Exception as e:
         await message.answer(
@@ -425,7 +494,7 @@ async def btn_planning_days_DISABLED(message: Message):
 async def cb_plan_day_DISABLED(callback: CallbackQuery):
     await callback.answer()
 
-    cache = PLANNING_CACHE.get(callback.from_user.id)
+    cache = _cache_get(PLANNING_CACHE, callback.from_user.id)
     if not cache:
         await callback.message.answer(
             "⚠️ План не найден. Нажмите «Планирование по дням» ещё раз.",
@@ -463,12 +532,12 @@ async def cb_plan_day_DISABLED(callback: CallbackQuery):
 
         if png_path.exists():
             await callback.message.answer_document(
-                FSInputFile(str(png_path)), caption=f"День {day} • Линия {track.line}"
+                _upload(str(png_path)), caption=f"День {day} • Линия {track.line}"
             )
         if pdf_path.exists():
-            await callback.message.answer_document(FSInputFile(str(pdf_path)))
+            await callback.message.answer_document(_upload(str(pdf_path)))
         for extra in extras:
-            await callback.message.answer_document(FSInputFile(str(extra)))
+            await callback.message.answer_document(_upload(str(extra)))
 
 
 @router.message(F.text == "Коммерческое предложение PDF")
@@ -499,30 +568,14 @@ async def receive_order_and_generate_pdf(message: Message, state: FSMContext):
         set_plate_lists_from_text(message.text or "")
         
         # Собираем данные заказа из глобальных списков
-        from collections import Counter
         order_data = []
         
         # Собираем все плиты по типам
-        plate_groups = [
-            (1200, cfg.PLATES_1_2, "12"),
-            (1080, cfg.PLATES_1_08, "10.8"),
-            (1000, cfg.PLATES_1_0, "10"),
-            (320, cfg.PLATES_0_32, "3.2"),
-            (460, cfg.PLATES_0_46, "4.6"),
-            (700, cfg.PLATES_0_70, "7"),
-            (720, cfg.PLATES_0_72, "7.2"),
-            (860, cfg.PLATES_0_86, "8.6"),
-            (880, cfg.PLATES_0_88, "8.8"),
-            (740, cfg.PLATES_0_74, "7.4"),
-            (480, cfg.PLATES_0_48, "4.8"),
-            (500, cfg.PLATES_0_50, "5"),
-            (340, cfg.PLATES_0_34, "3.4"),
-        ]
-        
-        for width_mm, plates_list, width_dm_str in plate_groups:
+        for attr, width_mm, width_dm_str in PLATE_GROUPS_KP:
+            plates_list = getattr(cfg, attr)
             if plates_list:
                 # Группируем по длине
-                length_counts = Counter(plates_list)
+                length_counts = _length_counts(plates_list)
                 for length_m, qty in length_counts.items():
                     length_dm = int(round(length_m * 10))
                     # Формируем наименование в формате "Плиты ПБ 38-12-8п"
@@ -547,11 +600,10 @@ async def receive_order_and_generate_pdf(message: Message, state: FSMContext):
                 "Пожалуйста, проверьте формат и попробуйте снова.",
                 reply_markup=main_menu_kb()
             )
-            await state.clear()
             return
         
         # Сохраняем заказ в кэш
-        ORDER_CACHE[message.from_user.id] = order_data
+        _cache_set(ORDER_CACHE, message.from_user.id, order_data)
         
         # Генерируем номер и дату КП
         offer_number = f"{message.from_user.id}_{datetime.now().strftime('%Y%m%d%H%M')}"
@@ -577,24 +629,21 @@ async def receive_order_and_generate_pdf(message: Message, state: FSMContext):
         pdf_filename = f"КП_{offer_number}_{offer_date.replace('.', '')}.pdf"
         pdf_path = os.path.join(OUTPUTS_DIR, pdf_filename)
         
-        with open(pdf_path, 'wb') as f:
-            f.write(pdf_buffer.getvalue())
+        await asyncio.to_thread(_save_buffer, pdf_buffer, pdf_path)
         
         # Формируем сводку по заказу
         total_qty = sum(item['qty'] for item in order_data)
-        summary = f"✅ Коммерческое предложение готово!\n\n"
-        summary += f"📋 Заказ:\n"
-        for item in order_data:
-            summary += f"  • {item['name']} — {item['qty']} шт\n"
-        summary += f"\n📊 Всего позиций: {len(order_data)}\n"
-        summary += f"📦 Всего плит: {total_qty} шт\n"
+        summary = ["✅ Коммерческое предложение готово!\n", "📋 Заказ:"]
+        summary.extend(f"  • {item['name']} — {item['qty']} шт" for item in order_data)
+        summary.append(f"\n📊 Всего позиций: {len(order_data)}")
+        summary.append(f"📦 Всего плит: {total_qty} шт\n")
         
-        await message.answer(summary)
+        await message.answer("\n".join(summary))
         
         # Отправляем PDF
         if os.path.exists(pdf_path):
             await message.answer_document(
-                FSInputFile(pdf_path),
+                _upload(pdf_path),
                 caption=f"📄 Коммерческое предложение № {offer_number}"
             )
             await message.answer(
@@ -620,21 +669,117 @@ async def receive_order_and_generate_pdf(message: Message, state: FSMContext):
             reply_markup=main_menu_kb()
         )
     finally:
-        await state.clear()
+        # Данных в FSM нет, set_state(None) равносилен clear()
+        await state.set_state(None)
 
 
 # ==================== НОВЫЕ КОМАНДЫ: /myorders, /export ====================
 
+def _myorders_sync(user_id: int):
+    """Читает последние заказы пользователя (выполняется в отдельном потоке)"""
+    # Пакет domain подключается лениво: без него бот должен запускаться
+    from domain.export import get_user_orders
+
+    con = sqlite3.connect('pb.db')
+    try:
+        return get_user_orders(con, user_id, limit=10)
+    finally:
+        con.close()
+
+
+def _order_items_sync(order_id: int):
+    """Читает позиции заказа (выполняется в отдельном потоке)"""
+    # Пакет domain подключается лениво: без него бот должен запускаться
+    from domain.export import get_order_items
+
+    con = sqlite3.connect('pb.db')
+    try:
+        return get_order_items(con, order_id)
+    finally:
+        con.close()
+
+
+def _export_sync(order_id: int, items):
+    """Формирует КЗ и архив заказа по уже прочитанным позициям (выполняется в отдельном потоке).
+
+    Возвращает путь к архиву.
+    """
+    from domain.export import create_order_archive
+    from domain.calc import cost_standard, cost_addon
+    from domain.excel_kz import generate_kz_excel
+    # TODO: Модуль не реализован
+    # from commercial_offer import generate_commercial_offer_pdf
+
+    con = sqlite3.connect('pb.db')
+    try:
+        # Генерируем файлы
+        output_dir = Path("Визуализация_Раскладки")
+        output_dir.mkdir(exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # 1. Excel КЗ
+        excel_path = generate_kz_excel(
+            con,
+            items,
+            tracks=None,
+            output_path=str(output_dir / f"kz_{order_id}_{timestamp}.xlsx"),
+            order_number=str(order_id),
+            customer_name=None
+        )
+
+        # 2. PDF КП
+        order_data = []
+        for item in items:
+            length_dm = int(round(item['length_m'] * 10))
+            width_dm = int(round(item['width_m'] * 10))
+            name = f"ПБ {length_dm}-{width_dm}-{int(item['load_class'])}п"
+            order_data.append({
+                'name': name,
+                'length_m': item['length_m'],
+                'width_m': item['width_m'],
+                'qty': item['qty']
+            })
+
+        # TODO: Функция не реализована
+        # pdf_buffer = generate_commercial_offer_pdf(
+        #     order_data,
+        #     offer_number=str(order_id),
+        #     offer_date=datetime.now().strftime("%d.%m.%Y"),
+        #     customer_name=None
+        # )
+
+        # pdf_path = output_dir / f"kp_{order_id}_{timestamp}.pdf"
+        # _save_buffer(pdf_buffer, pdf_path)
+        pdf_path = None  # Заглушка - функция не реализована
+    finally:
+        con.close()
+
+    # 3. Архивируем
+    files_to_archive = [excel_path]
+    if pdf_path:
+        files_to_archive.append(pdf_path)
+    return create_order_archive(
+        order_id,
+        files_to_archive,
+        output_dir=str(output_dir)
+    )
+
+
 @router.message(Command("myorders"))
 async def cmd_myorders(message: Message):
     """Показывает историю заказов пользователя"""
+    uid = message.from_user.id
+    now = time.monotonic()
+    cached = _cache_get(MYORDERS_CACHE, uid)
+    if cached and now - cached[0] < MYORDERS_TTL:
+        # Повторное нажатие - отдаём недавно сформированный список без запроса к БД
+        await message.answer(cached[1], parse_mode="HTML", reply_markup=main_menu_kb())
+        return
+
     try:
-        import sqlite3
-        from domain.export import get_user_orders
-        
-        con = sqlite3.connect('pb.db')
-        orders = get_user_orders(con, message.from_user.id, limit=10)
-        con.close()
+        # Запрос к БД не должен блокировать остальные обработчики
+        orders = await asyncio.to_thread(_myorders_sync, uid)
         
         if not orders:
             await message.answer(
@@ -666,6 +811,7 @@ async def cmd_myorders(message: Message):
         
         response += "\n💡 Для экспорта заказа используйте команду /export_НОМЕР"
         
+        _cache_set(MYORDERS_CACHE, uid, (now, response))
         await message.answer(response, parse_mode="HTML", reply_markup=main_menu_kb())
         
     except Exception as e:
@@ -680,39 +826,26 @@ async def cmd_export(message: Message):
     """Экспортирует заказ в ZIP архив"""
     try:
         # Парсим ID заказа из команды /export_123
-        command_parts = message.text.split('_')
-        if len(command_parts) < 2:
-            await message.answer(
-                "❓ Укажите номер заказа: /export_123\n\n"
-                "Посмотреть список заказов: /myorders",
-                reply_markup=main_menu_kb()
-            )
-            return
-        
-        try:
-            order_id = int(command_parts[1])
-        except ValueError:
-            await message.answer(
-                "❌ Неверный формат номера заказа",
-                reply_markup=main_menu_kb()
-            )
+        text = message.text or ''
+        m = _EXPORT_RE.match(text)
+        if not m:
+            if '_' in text:
+                await message.answer(
+                    "❌ Неверный формат номера заказа",
+                    reply_markup=main_menu_kb()
+                )
+            else:
+                await message.answer(
+                    "❓ Укажите номер заказа: /export_123\n\n"
+                    "Посмотреть список заказов: /myorders",
+                    reply_markup=main_menu_kb()
+                )
             return
+        order_id = int(m.group(1))
         
-        import sqlite3
-        from pathlib import Path
-        from domain.export import get_order_items, create_order_archive
-        from domain.calc import cost_standard, cost_addon
-        from domain.excel_kz import generate_kz_excel
-        # TODO: Модуль не реализован
-        # from commercial_offer import generate_commercial_offer_pdf
-        from datetime import datetime
-        
-        # Получаем данные заказа
-        con = sqlite3.connect('pb.db')
-        items = get_order_items(con, order_id)
-        
+        # Сначала проверяем, что заказ есть, и только потом сообщаем о сборке архива
+        items = await asyncio.to_thread(_order_items_sync, order_id)
         if not items:
-            con.close()
             await message.answer(
                 f"❌ Заказ #{order_id} не найден или у вас нет к нему доступа",
                 reply_markup=main_menu_kb()
@@ -721,64 +854,13 @@ async def cmd_export(message: Message):
         
         await message.answer("⏳ Формирую архив заказа...")
         
-        # Генерируем файлы
-        output_dir = Path("Визуализация_Раскладки")
-        output_dir.mkdir(exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # 1. Excel КЗ
-        excel_path = generate_kz_excel(
-            con,
-            items,
-            tracks=None,
-            output_path=str(output_dir / f"kz_{order_id}_{timestamp}.xlsx"),
-            order_number=str(order_id),
-            customer_name=None
-        )
-        
-        # 2. PDF КП
-        order_data = []
-        for item in items:
-            length_dm = int(round(item['length_m'] * 10))
-            width_dm = int(round(item['width_m'] * 10))
-            name = f"ПБ {length_dm}-{width_dm}-{int(item['load_class'])}п"
-            order_data.append({
-                'name': name,
-                'length_m': item['length_m'],
-                'width_m': item['width_m'],
-                'qty': item['qty']
-            })
-        
-        # TODO: Функция не реализована
-        # pdf_buffer = generate_commercial_offer_pdf(
-        #     order_data,
-        #     offer_number=str(order_id),
-        #     offer_date=datetime.now().strftime("%d.%m.%Y"),
-        #     customer_name=None
-        # )
-        
-        # pdf_path = output_dir / f"kp_{order_id}_{timestamp}.pdf"
-        # with open(pdf_path, 'wb') as f:
-        #     f.write(pdf_buffer.getvalue())
-        pdf_path = None  # Заглушка - функция не реализована
-        
-        con.close()
-        
-        # 3. Архивируем
-        files_to_archive = [excel_path]
-        if pdf_path:
-            files_to_archive.append(pdf_path)
-        archive_path = create_order_archive(
-            order_id,
-            files_to_archive,
-            output_dir=str(output_dir)
-        )
+        # Генерация Excel и упаковка - в отдельном потоке
+        archive_path = await asyncio.to_thread(_export_sync, order_id, items)
         
         # Отправляем архив
         if archive_path.exists():
             await message.answer_document(
-                FSInputFile(archive_path),
+                _upload(archive_path),
                 caption=f"📦 Архив заказа #{order_id}\n\nВключает КП (PDF) и КЗ (Excel)"
             )
             
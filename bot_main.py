@@ -1,13 +1,16 @@
 import asyncio
 import logging
 import os
-from pathlib import Path
+import sqlite3
+from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
 from bot_handlers import register_handlers
-from bot_config import BOT_TOKEN
+from bot_config import CFG
 
 # Настройка логирования
 logging.basicConfig(
@@ -16,6 +19,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class PooledSession(AiohttpSession):
+    """
+    HTTP-сессия бота с ограниченным пулом keep-alive соединений.
+
+    aiogram переиспользует одну ClientSession, но коннектор создаёт с настройками
+    по умолчанию; здесь явно задаём размер пула и время жизни простаивающих соединений.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 50, keepalive_timeout: float = 75, **kwargs):
+        super().__init__(**kwargs)
+        self._connector_init.update(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+        )
+
+# Таблицы, без которых расчёты бота не работают
+REQUIRED_TABLES = ("prices", "slab_sizes")
+
 def init_database():
     """Проверяет наличие базы данных"""
     try:
@@ -25,15 +47,53 @@ def init_database():
             logger.warning(f"⚠️ База данных {db_path} не найдена!")
             logger.info("💡 Создайте базу pb.db или проверьте путь к файлу")
             logger.info("💡 Бот продолжит работу, но некоторые функции могут быть недоступны")
-        else:
-            logger.info(f"✅ База данных {db_path} найдена")
+            return
+        
+        # Схему проверяем только по запросу (STRICT_DB=1), обычно хватает наличия файла
+        if CFG.STRICT_DB:
+            con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                found = {row[0] for row in con.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )}
+            finally:
+                con.close()
+            missing = [t for t in REQUIRED_TABLES if t not in found]
+            if missing:
+                logger.warning(f"⚠️ В базе {db_path} нет таблиц: {', '.join(missing)}")
+                return
+        logger.info(f"✅ База данных {db_path} найдена")
     except Exception as e:
         logger.error(f"❌ Ошибка проверки БД: {e}")
         # Не прерываем работу - база может быть создана позже
 
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Принимает обновления от Telegram через webhook (aiohttp-сервер)"""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=CFG.WEBHOOK_SECRET
+    ).register(app, path=CFG.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        CFG.WEBHOOK_URL,
+        secret_token=CFG.WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, CFG.WEBAPP_HOST, CFG.WEBAPP_PORT)
+    await site.start()
+    logger.info(f"🌐 Webhook: {CFG.WEBHOOK_URL} (слушаю {CFG.WEBAPP_HOST}:{CFG.WEBAPP_PORT})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
 async def main():
     """Основная функция запуска бота"""
-    if not BOT_TOKEN:
+    if not CFG.BOT_TOKEN:
         logger.error("BOT_TOKEN не найден! Проверьте файл .env")
         return
     
@@ -42,7 +102,8 @@ async def main():
     
     # Создаём бота и диспетчер
     bot = Bot(
-        token=BOT_TOKEN,
+        token=CFG.BOT_TOKEN,
+        session=PooledSession(),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
     dp = Dispatcher()
@@ -53,8 +114,13 @@ async def main():
     logger.info("🚀 Бот запущен!")
     
     try:
-        # Запускаем поллинг
-        await dp.start_polling(bot)
+        if CFG.WEBHOOK_URL:
+            await run_webhook(bot, dp)
+        else:
+            # WEBHOOK_URL не задан - запускаем поллинг. Webhook от прошлого запуска
+            # снимаем, иначе Telegram отклоняет getUpdates с ошибкой конфликта
+            await bot.delete_webhook(drop_pending_updates=False)
+            await dp.start_polling(bot)
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}")
     finally:
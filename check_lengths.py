@@ -11,10 +11,14 @@ for row in lengths:
 
 print('\n=== НУЖНЫЕ ДЛИНЫ ===')
 needed_lengths = [34, 66, 78, 56, 47, 68]
+# Все длины одним запросом (length_dm - первый столбец первичного ключа prices)
+placeholders = ','.join('?' * len(needed_lengths))
+counts = dict(cursor.execute(
+    f'SELECT length_dm, COUNT(*) FROM prices WHERE length_dm IN ({placeholders}) GROUP BY length_dm',
+    needed_lengths,
+).fetchall())
 for length_dm in needed_lengths:
-    cursor.execute('SELECT COUNT(*) FROM prices WHERE length_dm = ?', (length_dm,))
-    count = cursor.fetchone()[0]
-    status = 'ЕСТЬ' if count > 0 else 'НЕТ'
+    status = 'ЕСТЬ' if counts.get(length_dm, 0) > 0 else 'НЕТ'
     print(f'{length_dm} дм ({length_dm/10:.1f}м): {status}')
 
 conn.close()
@@ -4,11 +4,19 @@
 Модуль проверки допустимости нагрузок и опирания плит
 Серия ПБ ЖБК СТАРТ
 """
+import atexit
+import os
 import sqlite3
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
 
+# База рядом со скриптом, а не в текущей папке (как price_db.DEFAULT_DB)
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pb.db')
+
+
 # Классы нагрузок для серии ПБ ЖБК СТАРТ (в сотнях кг/м²)
 LOAD_CLASSES = [6, 8, 10, 12.5, 16, 21]
 
@@ -19,6 +27,58 @@ MIN_BEARING_MM = {
 }
 
 
+@lru_cache(maxsize=1)
+def _conn() -> sqlite3.Connection:
+    """
+    Общее соединение с БД на весь процесс.
+
+    Кэш страниц SQLite живёт, пока открыто соединение, поэтому повторные
+    проверки (запросы бота) читают каталог из памяти, а не с диска.
+    """
+    # Каталог только читается: открываем базу в режиме read-only, чтобы проверка
+    # не меняла файл pb.db (журнал, заголовок). При занятой базе ждём до 30 с
+    c = sqlite3.connect(Path(DB_PATH).as_uri() + '?mode=ro', uri=True, check_same_thread=False)
+    c.execute('PRAGMA busy_timeout=30000')
+    atexit.register(c.close)
+    return c
+
+
+# Каталог типоразмеров из slab_sizes: (длина мм -> доступные классы нагрузки, мин. мм, макс. мм).
+# Таблица маленькая и статичная: читается один раз, при первой проверке
+_CATALOG: Optional[tuple[dict[int, tuple[float, ...]], int, int]] = None
+
+
+def _read_catalog(con: sqlite3.Connection) -> tuple[dict[int, tuple[float, ...]], int, int]:
+    """Читает slab_sizes: (длина мм -> классы нагрузки, мин. длина мм, макс. длина мм)"""
+    by_len: dict[int, set] = {}
+    for length_mm, load_class in con.execute('SELECT length_mm, load_class FROM slab_sizes'):
+        by_len.setdefault(length_mm, set()).add(load_class)
+    classes = {L: tuple(sorted(c)) for L, c in by_len.items()}
+    return classes, min(by_len, default=0), max(by_len, default=0)
+
+
+def refresh(con: Optional[sqlite3.Connection] = None) -> None:
+    """
+    Перечитывает каталог типоразмеров из БД (например, после обновления slab_sizes)
+    
+    Args:
+        con: Соединение с БД (по умолчанию - общее соединение модуля)
+    """
+    global _CATALOG
+    if con is None:
+        con = _conn()
+    _CATALOG = _read_catalog(con)
+
+
+def _catalog(con: Optional[sqlite3.Connection] = None) -> tuple[dict[int, tuple[float, ...]], int, int]:
+    """Каталог из памяти модуля или, если передано своё соединение, - из него"""
+    if con is not None:
+        return _read_catalog(con)
+    if _CATALOG is None:
+        refresh()
+    return _CATALOG
+
+
 @dataclass
 class LoadCheckResult:
     """Результат проверки нагрузки или опирания"""
@@ -28,47 +88,34 @@ class LoadCheckResult:
 
 
 def check_load(
-    con: sqlite3.Connection,
     length_m: float,
-    load_class: float
+    load_class: float,
+    con: Optional[sqlite3.Connection] = None
 ) -> LoadCheckResult:
     """
     Проверяет допустимость класса нагрузки для заданной длины
     
     Args:
-        con: Соединение с БД
         length_m: Длина плиты в метрах
         load_class: Класс нагрузки
+        con: Соединение с БД (по умолчанию - каталог общего соединения модуля)
         
     Returns:
         LoadCheckResult с результатом проверки
     """
     length_mm = int(round(length_m * 1000))
+    classes_by_len, _, _ = _catalog(con)
     
-    # Проверяем наличие типоразмера в БД
-    cursor = con.execute("""
-        SELECT COUNT(*) FROM slab_sizes
-        WHERE length_mm = ? AND load_class = ?
-    """, (length_mm, load_class))
-    
-    count = cursor.fetchone()[0]
+    # Доступные классы для этой длины (из каталога в памяти)
+    available = classes_by_len.get(length_mm, ())
     
-    if count > 0:
+    if load_class in available:
         return LoadCheckResult(
             ok=True,
             reason=f"Плита {length_m:.2f}м с классом нагрузки {load_class} есть в серии ПБ ЖБК СТАРТ",
             suggest=None
         )
     
-    # Ищем доступные классы для этой длины
-    cursor = con.execute("""
-        SELECT DISTINCT load_class FROM slab_sizes
-        WHERE length_mm = ?
-        ORDER BY load_class
-    """, (length_mm,))
-    
-    available = [row[0] for row in cursor.fetchall()]
-    
     if not available:
         return LoadCheckResult(
             ok=False,
@@ -140,24 +187,20 @@ def check_bearing(
 
 
 def check_length_range(
-    con: sqlite3.Connection,
-    length_m: float
+    length_m: float,
+    con: Optional[sqlite3.Connection] = None
 ) -> LoadCheckResult:
     """
     Проверяет, входит ли длина в диапазон серии
     
     Args:
-        con: Соединение с БД
         length_m: Длина в метрах
+        con: Соединение с БД (по умолчанию - каталог общего соединения модуля)
         
     Returns:
         LoadCheckResult с результатом проверки
     """
-    cursor = con.execute("""
-        SELECT MIN(length_mm), MAX(length_mm) FROM slab_sizes
-    """)
-    
-    min_mm, max_mm = cursor.fetchone()
+    _, min_mm, max_mm = _catalog(con)
     min_m = min_mm / 1000.0
     max_m = max_mm / 1000.0
     
@@ -206,8 +249,6 @@ if __name__ == "__main__":
     import sys
     sys.path.insert(0, '.')
     
-    conn = sqlite3.connect('pb.db')
-    
     print('=== ПРОВЕРКА НАГРУЗОК ===\n')
     
     test_cases = [
@@ -219,7 +260,7 @@ if __name__ == "__main__":
     ]
     
     for length_m, load_class in test_cases:
-        result = check_load(conn, length_m, load_class)
+        result = check_load(length_m, load_class)
         print(f"Длина {length_m}м, класс {load_class}:")
         print(f"  {format_check_message(result)}\n")
     
@@ -236,8 +277,6 @@ if __name__ == "__main__":
         result = check_bearing(support_type, bearing_mm)
         print(f"{support_type}, {bearing_mm}мм:")
         print(f"  {format_check_message(result)}\n")
-    
-    conn.close()
 
 
 
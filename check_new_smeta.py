@@ -1,13 +1,21 @@
-import pandas as pd
+def main():
+    # pandas импортируем только при запуске проверки (импорт занимает заметное время)
+    import pandas as pd
 
-# Читаем новую смету
-df = pd.read_excel('Визуализация_Раскладки/Смета_Дорожка_1_20251027_1346.xlsx', sheet_name='Смета')
+    # Читаем новую смету
+    df = pd.read_excel('Визуализация_Раскладки/Смета_Дорожка_1_20251027_1346.xlsx', sheet_name='Смета')
 
-print('=== НОВАЯ СМЕТА С ИСПРАВЛЕННЫМИ ЦЕНАМИ ===')
-print(df.to_string(index=False))
+    print('=== НОВАЯ СМЕТА С ИСПРАВЛЕННЫМИ ЦЕНАМИ ===')
+    print(df.to_string(index=False))
 
-# Подсчитываем общую стоимость
-total_cost = df['Сумма'].str.replace(' ', '').str.replace(',', '.').astype(float).sum()
-print(f'\n=== ИТОГО ===')
-print(f'Общая стоимость: {total_cost:,.0f} руб')
-print(f'Количество позиций: {len(df)}')
+    # Подсчитываем общую стоимость: убираем разделители тысяч (в т.ч. неразрывный
+    # пробел) и меняем десятичную запятую на точку за один проход
+    trans = str.maketrans({' ': '', '\u00a0': '', ',': '.'})
+    total_cost = pd.to_numeric(df['Сумма'].astype(str).str.translate(trans), errors='coerce').sum()
+    print(f'\n=== ИТОГО ===')
+    print(f'Общая стоимость: {total_cost:,.0f} руб')
+    print(f'Количество позиций: {len(df)}')
+
+
+if __name__ == '__main__':
+    main()
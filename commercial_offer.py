@@ -5,18 +5,22 @@
 Создаёт документ по образцу КП № 1133 от 16.10.2025
 """
 
+from __future__ import annotations
+
+import atexit
 import io
 import os
 import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Iterable
+
+# ReportLab импортируется лениво - внутри функций построения PDF, чтобы
+# расчёт цен (calculate_total_cost, get_plate_price) не тянул его за собой
+if TYPE_CHECKING:
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import TableStyle
 
 
 # ==================== КОНСТАНТЫ ====================
@@ -41,14 +45,34 @@ DB_PATH = "pb.db"
 
 # ==================== РЕГИСТРАЦИЯ ШРИФТОВ ====================
 
+_FONTS_REGISTERED = False
+
+
 def register_fonts():
     """
     Регистрирует русские шрифты для ReportLab
     Ищет доступные шрифты Windows с поддержкой кириллицы
+    
+    Выполняется один раз - при первой генерации PDF (или первом обращении
+    к FONT_NORMAL / FONT_BOLD / HAS_CYRILLIC_FONTS), а не при импорте модуля.
     """
+    global _FONTS_REGISTERED, HAS_CYRILLIC_FONTS, FONT_NORMAL, FONT_BOLD
+    if _FONTS_REGISTERED:
+        return HAS_CYRILLIC_FONTS
+    
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    
     # Пути к стандартным шрифтам Windows
     windows_fonts = os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts')
     
+    # Читаем папку шрифтов один раз: имя файла в нижнем регистре -> полный путь
+    try:
+        with os.scandir(windows_fonts) as it:
+            fonts_on_disk = {e.name.lower(): e.path for e in it if e.is_file()}
+    except OSError:
+        fonts_on_disk = {}
+    
     # Список шрифтов для регистрации (имя в ReportLab, файл TTF)
     fonts_to_register = [
         ('DejaVuSans', 'DejaVuSans.ttf'),
@@ -60,38 +84,73 @@ def register_fonts():
     ]
     
     registered = False
+    FONT_NORMAL = 'Helvetica'
+    FONT_BOLD = 'Helvetica-Bold'
     
     for font_name, font_file in fonts_to_register:
-        font_path = os.path.join(windows_fonts, font_file)
+        font_path = fonts_on_disk.get(font_file.lower())
         
-        if os.path.exists(font_path):
+        if font_path:
             try:
                 pdfmetrics.registerFont(TTFont(font_name, font_path))
                 if not registered:
                     # Используем первый найденный шрифт как основной
-                    globals()['FONT_NORMAL'] = font_name
-                    globals()['FONT_BOLD'] = font_name + '-Bold' if font_name != 'DejaVuSans' else font_name
+                    FONT_NORMAL = font_name
+                    FONT_BOLD = font_name + '-Bold' if font_name != 'DejaVuSans' else font_name
                     registered = True
             except Exception as e:
                 continue
     
-    if not registered:
-        # Если не нашли ни одного TTF шрифта, используем встроенные
-        # (но они не поддерживают кириллицу)
-        globals()['FONT_NORMAL'] = 'Helvetica'
-        globals()['FONT_BOLD'] = 'Helvetica-Bold'
-    
+    # Если не нашли ни одного TTF шрифта, остаются встроенные Helvetica
+    # (но они не поддерживают кириллицу)
+    HAS_CYRILLIC_FONTS = registered
+    _FONTS_REGISTERED = True
     return registered
 
 
-# Регистрируем шрифты при импорте модуля
-HAS_CYRILLIC_FONTS = register_fonts()
-FONT_NORMAL = globals().get('FONT_NORMAL', 'Helvetica')
-FONT_BOLD = globals().get('FONT_BOLD', 'Helvetica-Bold')
+def __getattr__(name):
+    # Шрифты регистрируются лениво: FONT_NORMAL, FONT_BOLD и HAS_CYRILLIC_FONTS
+    # появляются в модуле только после register_fonts()
+    if name in ('FONT_NORMAL', 'FONT_BOLD', 'HAS_CYRILLIC_FONTS'):
+        register_fonts()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ==================== ФУНКЦИИ ====================
 
+# Одно соединение с базой цен на весь процесс (КП генерируется из потоков бота,
+# поэтому check_same_thread=False и доступ только под блокировкой)
+_CONN: Optional[sqlite3.Connection] = None
+_conn_lock = threading.Lock()
+
+# Запрос цены одной плиты: один и тот же текст SQL попадает в кэш подготовленных выражений
+_PRICE_SQL = "SELECT price FROM prices WHERE length_dm = ? AND load_code = ?"
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Открывает и настраивает соединение с базой цен при первом обращении"""
+    global _CONN
+    if _CONN is None:
+        con = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+        # Только настройки самого соединения: КП базу не пишет, поэтому режим
+        # журнала (и заголовок файла pb.db) не трогаем
+        con.execute("PRAGMA cache_size=-64000")
+        con.execute("PRAGMA temp_store=MEMORY")
+        con.execute("PRAGMA mmap_size=268435456")
+        atexit.register(con.close)
+        _CONN = con
+    return _CONN
+
+
+@lru_cache(maxsize=1024)
+def _get_plate_price_cached(length_dm: int, load_code: int) -> Optional[float]:
+    """Цена из таблицы prices (None, если такой плиты нет); результат кэшируется"""
+    with _conn_lock:
+        result = _get_conn().execute(_PRICE_SQL, (length_dm, load_code)).fetchone()
+    return float(result[0]) if result else None
+
+
 def get_plate_price(length_m: float, width_m: float, load_class: int = 800) -> float:
     """
     Получает цену плиты из базы данных по длине, ширине и классу нагрузки
@@ -109,21 +168,13 @@ def get_plate_price(length_m: float, width_m: float, load_class: int = 800) -> f
         length_dm = int(round(length_m * 10))
         
         # Определяем код нагрузки (8 = 800 кг/м², 10 = 1000 кг/м²)
-        load_code = load_class // 100
-        
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        
-        # Ищем цену в таблице prices
-        result = cur.execute(
-            "SELECT price FROM prices WHERE length_dm = ? AND load_code = ?",
-            (length_dm, load_code)
-        ).fetchone()
+        load_code = int(load_class // 100)
         
-        con.close()
+        # Ищем цену в таблице prices (повторные запросы той же плиты - из кэша)
+        price = _get_plate_price_cached(length_dm, load_code)
         
-        if result:
-            return float(result[0])
+        if price is not None:
+            return price
         else:
             # Если нет точной цены, используем базовую формулу
             # Примерная цена: 4000 руб/м² * площадь плиты
@@ -137,30 +188,89 @@ def get_plate_price(length_m: float, width_m: float, load_class: int = 800) -> f
         return round(area_m2 * 4000, 2)
 
 
-def calculate_total_cost(order_data: List[Dict]) -> Dict:
+def clear_price_cache() -> None:
+    """Сбрасывает кэш цен - вызывать после записи нового прайса в базу"""
+    _get_plate_price_cached.cache_clear()
+
+
+def _price_key(item: Dict) -> Tuple[int, int]:
+    """Ключ поиска цены позиции: (длина в дм, код нагрузки)"""
+    return int(round(item.get('length_m', 0) * 10)), item.get('load_class', 800) // 100
+
+
+def get_plate_prices(pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], float]:
+    """
+    Получает цены сразу для нескольких плит одним запросом к базе
+    
+    Args:
+        pairs: пары (длина в дм, код нагрузки)
+    
+    Returns:
+        Словарь {(length_dm, load_code): цена}; отсутствующих в базе пар в нём нет
+    """
+    pairs = list(set(pairs))
+    if not pairs:
+        return {}
+    
+    placeholders = ",".join(["(?,?)"] * len(pairs))
+    params = [v for pair in pairs for v in pair]
+    try:
+        with _conn_lock:
+            rows = _get_conn().execute(
+                "SELECT length_dm, load_code, price FROM prices "
+                f"WHERE (length_dm, load_code) IN (VALUES {placeholders})",
+                params
+            ).fetchall()
+    except Exception as e:
+        print(f"Ошибка получения цен: {e}")
+        return {}
+    
+    return {(length_dm, load_code): float(price) for length_dm, load_code, price in rows}
+
+
+def _item_price(item: Dict, prices: Dict[Tuple[int, int], float]) -> float:
+    """Цена позиции из заранее полученного словаря цен (или по формуле, если цены нет)"""
+    price = prices.get(_price_key(item))
+    if price is not None:
+        return price
+    # Примерная цена: 4000 руб/м² * площадь плиты
+    area_m2 = item.get('length_m', 0) * item.get('width_m', 0)
+    return round(area_m2 * 4000, 2)
+
+
+def calculate_total_cost(
+    order_data: List[Dict],
+    prices: Optional[Dict[Tuple[int, int], float]] = None
+) -> Dict:
     """
     Рассчитывает общую стоимость заказа
     
     Args:
         order_data: список позиций заказа с полями name, length_m, width_m, qty
+        prices: уже полученные цены (см. get_plate_prices); если не заданы - читаются из базы
     
     Returns:
-        Словарь с итоговыми суммами
+        Словарь с итоговыми суммами, а также ценами (unit_prices) и суммами
+        (item_sums) по каждой позиции в порядке order_data
     """
+    if prices is None:
+        prices = get_plate_prices(_price_key(item) for item in order_data)
+    
     total_qty = 0
     total_cost = 0.0
+    unit_prices: List[float] = []
+    item_sums: List[float] = []
     
     for item in order_data:
         qty = item.get('qty', 0)
-        length_m = item.get('length_m', 0)
-        width_m = item.get('width_m', 0)
-        load_class = item.get('load_class', 800)
         
         # Получаем цену за единицу
-        unit_price = get_plate_price(length_m, width_m, load_class)
+        unit_price = _item_price(item, prices)
         
         # Считаем сумму по позиции
         item_cost = unit_price * qty
+        unit_prices.append(unit_price)
+        item_sums.append(item_cost)
         
         total_qty += qty
         total_cost += item_cost
@@ -173,10 +283,185 @@ def calculate_total_cost(order_data: List[Dict]) -> Dict:
         'total_qty': total_qty,
         'subtotal': round(total_cost, 2),
         'vat_amount': vat_amount,
-        'total_with_vat': total_with_vat
+        'total_with_vat': total_with_vat,
+        'unit_prices': unit_prices,
+        'item_sums': item_sums
     }
 
 
+# Заголовок таблицы позиций КП
+_TABLE_HEADER = ('№', 'Наименование', 'Ед.изм.', 'Кол-во', 'Цена, руб.', 'Сумма, руб.')
+
+# Разделитель тысяч - неразрывный пробел, чтобы ReportLab не переносил число
+_NUM_TRANS = str.maketrans({',': '\u00a0'})
+
+
+def _fmt_money(value: float) -> str:
+    """Форматирует сумму в рублях: 1\u00a0234\u00a0567.89"""
+    return format(value, ',.2f').translate(_NUM_TRANS)
+
+
+_STYLES: Optional[Tuple[ParagraphStyle, ParagraphStyle, ParagraphStyle]] = None
+
+
+def _get_styles() -> Tuple[ParagraphStyle, ParagraphStyle, ParagraphStyle]:
+    """
+    Стили абзацев КП: (заголовок, обычный, мелкий)
+    
+    Создаются один раз после регистрации шрифтов и переиспользуются всеми PDF.
+    """
+    global _STYLES
+    if _STYLES is None:
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import mm
+        
+        register_fonts()
+        styles = getSampleStyleSheet()
+        
+        # Кастомные стили с русскими шрифтами
+        style_title = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontName=FONT_BOLD,
+            fontSize=16,
+            textColor=colors.HexColor('#1f4788'),
+            spaceAfter=6*mm,
+            alignment=1  # center
+        )
+        
+        style_normal = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontName=FONT_NORMAL,
+            fontSize=10,
+            leading=14
+        )
+        
+        style_small = ParagraphStyle(
+            'CustomSmall',
+            parent=styles['Normal'],
+            fontName=FONT_NORMAL,
+            fontSize=9,
+            leading=12
+        )
+        _STYLES = (style_title, style_normal, style_small)
+    return _STYLES
+
+
+@lru_cache(maxsize=1)
+def _get_table_style() -> TableStyle:
+    """
+    Стиль таблицы позиций КП. Зависит только от шрифтов, а строки итогов
+    адресуются с конца (-3..-1), поэтому один объект подходит для любого заказа.
+    """
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+    
+    register_fonts()
+    return TableStyle([
+        # Заголовок
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), FONT_BOLD),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+        
+        # Данные
+        ('BACKGROUND', (0, 1), (-1, -4), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # № по центру
+        ('ALIGN', (3, 1), (3, -1), 'CENTER'),  # Кол-во по центру
+        ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),  # Цены справа
+        ('FONTNAME', (0, 1), (-1, -1), FONT_NORMAL),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -4), 0.5, colors.grey),
+        
+        # Итоги
+        ('BACKGROUND', (0, -3), (-1, -1), colors.HexColor('#f0f0f0')),
+        ('FONTNAME', (0, -3), (-1, -1), FONT_BOLD),
+        ('FONTSIZE', (0, -3), (-1, -1), 10),
+        ('LINEABOVE', (0, -3), (-1, -3), 1.5, colors.black),
+        ('LINEABOVE', (0, -1), (-1, -1), 1.5, colors.black),
+        ('LINEBELOW', (0, -1), (-1, -1), 1.5, colors.black),
+        
+        # Общие настройки
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ])
+
+
+@lru_cache(maxsize=1)
+def _static_footer_spec() -> Tuple:
+    """
+    Неизменная часть КП после таблицы: условия поставки, банковские реквизиты
+    и подпись. Кэшируется только текст - элементы ('spacer', мм) или
+    ('normal' | 'small', текст абзаца).
+    """
+    spec = [('spacer', 8)]
+    
+    # ==================== УСЛОВИЯ ====================
+    
+    spec.append(('normal', "<b>Условия поставки:</b>"))
+    spec.append(('spacer', 2))
+    
+    conditions = [
+        "• Срок изготовления: 5-7 рабочих дней с момента поступления оплаты",
+        "• Форма оплаты: безналичный расчёт (100% предоплата)",
+        "• Доставка: рассчитывается отдельно в зависимости от адреса и объёма",
+        "• Разгрузка: силами и средствами заказчика",
+        "• Срок действия предложения: 14 календарных дней"
+    ]
+    spec.extend(('small', condition) for condition in conditions)
+    spec.append(('spacer', 5))
+    
+    # ==================== БАНКОВСКИЕ РЕКВИЗИТЫ ====================
+    
+    spec.append(('normal', "<b>Банковские реквизиты:</b>"))
+    spec.append(('spacer', 2))
+    
+    bank_details = [
+        f"Получатель: {COMPANY_NAME}",
+        f"ИНН {COMPANY_INN}, КПП {COMPANY_KPP}",
+        f"Расчётный счёт: {BANK_ACCOUNT}",
+        f"Банк: {BANK_NAME}",
+        f"БИК: {BANK_BIK}",
+        f"Корр. счёт: {BANK_CORR_ACCOUNT}"
+    ]
+    spec.extend(('small', detail) for detail in bank_details)
+    spec.append(('spacer', 10))
+    
+    # ==================== ПОДПИСЬ ====================
+    
+    spec.append(('normal',
+        "С уважением,<br/>"
+        f"Отдел продаж {COMPANY_NAME}<br/>"
+        f"Тел.: {COMPANY_PHONE}<br/>"
+        f"E-mail: {COMPANY_EMAIL}"
+    ))
+    
+    return tuple(spec)
+
+
+def _static_footer_flowables() -> list:
+    """
+    Собирает подвал КП заново для каждого документа: Paragraph хранит состояние
+    вёрстки, поэтому общие экземпляры нельзя отдавать параллельным сборкам PDF.
+    """
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, Spacer
+    
+    _, style_normal, style_small = _get_styles()
+    styles = {'normal': style_normal, 'small': style_small}
+    return [
+        Spacer(1, value*mm) if kind == 'spacer' else Paragraph(value, styles[kind])
+        for kind, value in _static_footer_spec()
+    ]
+
+
 def generate_commercial_offer_pdf(
     order_data: List[Dict],
     offer_number: str,
@@ -201,6 +486,13 @@ def generate_commercial_offer_pdf(
         BytesIO объект с содержимым PDF
     """
     
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+    
+    # Шрифты с кириллицей (регистрируются при первом вызове)
+    register_fonts()
+    
     # Создаём буфер для PDF
     buffer = io.BytesIO()
     
@@ -211,38 +503,14 @@ def generate_commercial_offer_pdf(
         rightMargin=20*mm,
         leftMargin=20*mm,
         topMargin=15*mm,
-        bottomMargin=15*mm
+        bottomMargin=15*mm,
+        # Сжимаем потоки страниц явно, не полагаясь на локальный rl_config;
+        # TTF-шрифты и так встраиваются подмножеством глифов
+        pageCompression=1
     )
     
     # Стили
-    styles = getSampleStyleSheet()
-    
-    # Кастомные стили с русскими шрифтами
-    style_title = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=FONT_BOLD,
-        fontSize=16,
-        textColor=colors.HexColor('#1f4788'),
-        spaceAfter=6*mm,
-        alignment=1  # center
-    )
-    
-    style_normal = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontName=FONT_NORMAL,
-        fontSize=10,
-        leading=14
-    )
-    
-    style_small = ParagraphStyle(
-        'CustomSmall',
-        parent=styles['Normal'],
-        fontName=FONT_NORMAL,
-        fontSize=9,
-        leading=12
-    )
+    style_title, style_normal, style_small = _get_styles()
     
     # Элементы документа
     story = []
@@ -299,158 +567,41 @@ def generate_commercial_offer_pdf(
     
     # ==================== ТАБЛИЦА С ПОЗИЦИЯМИ ====================
     
-    # Заголовки таблицы
-    table_data = [
-        ['№', 'Наименование', 'Ед.изм.', 'Кол-во', 'Цена, руб.', 'Сумма, руб.']
-    ]
-    
-    # Заполняем данные
+    # Заполняем данные (цены и суммы по позициям уже посчитаны в итогах)
     totals = calculate_total_cost(order_data)
     
-    for idx, item in enumerate(order_data, start=1):
-        name = item.get('name', 'Плита ПБ')
-        qty = item.get('qty', 0)
-        length_m = item.get('length_m', 0)
-        width_m = item.get('width_m', 0)
-        load_class = item.get('load_class', 800)
-        
-        # Получаем цену
-        unit_price = get_plate_price(length_m, width_m, load_class)
-        item_sum = unit_price * qty
-        
-        table_data.append([
+    rows = [
+        (
             str(idx),
-            name,
+            item.get('name', 'Плита ПБ'),
             'шт',
-            str(qty),
-            f"{unit_price:,.2f}".replace(',', ' '),
-            f"{item_sum:,.2f}".replace(',', ' ')
-        ])
-    
-    # Итоги
-    table_data.append([
-        '',
-        'ИТОГО:',
-        '',
-        str(totals['total_qty']),
-        '',
-        f"{totals['subtotal']:,.2f}".replace(',', ' ')
-    ])
-    
-    table_data.append([
-        '',
-        'НДС 20%:',
-        '',
-        '',
-        '',
-        f"{totals['vat_amount']:,.2f}".replace(',', ' ')
-    ])
+            str(item.get('qty', 0)),
+            _fmt_money(unit_price),
+            _fmt_money(item_sum)
+        )
+        for idx, (item, unit_price, item_sum) in enumerate(
+            zip(order_data, totals['unit_prices'], totals['item_sums']), start=1
+        )
+    ]
     
-    table_data.append([
-        '',
-        'ВСЕГО с НДС:',
-        '',
-        '',
-        '',
-        f"{totals['total_with_vat']:,.2f}".replace(',', ' ')
-    ])
+    # Заголовок, позиции и итоги собираем одним списком
+    table_data = [
+        _TABLE_HEADER,
+        *rows,
+        ('', 'ИТОГО:', '', str(totals['total_qty']), '', _fmt_money(totals['subtotal'])),
+        ('', 'НДС 20%:', '', '', '', _fmt_money(totals['vat_amount'])),
+        ('', 'ВСЕГО с НДС:', '', '', '', _fmt_money(totals['total_with_vat'])),
+    ]
     
     # Создаём таблицу
     table = Table(table_data, colWidths=[12*mm, 70*mm, 18*mm, 18*mm, 28*mm, 28*mm])
     
-    # Стили таблицы
-    table.setStyle(TableStyle([
-        # Заголовок
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), FONT_BOLD),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        
-        # Данные
-        ('BACKGROUND', (0, 1), (-1, -4), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # № по центру
-        ('ALIGN', (3, 1), (3, -1), 'CENTER'),  # Кол-во по центру
-        ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),  # Цены справа
-        ('FONTNAME', (0, 1), (-1, -1), FONT_NORMAL),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -4), 0.5, colors.grey),
-        
-        # Итоги
-        ('BACKGROUND', (0, -3), (-1, -1), colors.HexColor('#f0f0f0')),
-        ('FONTNAME', (0, -3), (-1, -1), FONT_BOLD),
-        ('FONTSIZE', (0, -3), (-1, -1), 10),
-        ('LINEABOVE', (0, -3), (-1, -3), 1.5, colors.black),
-        ('LINEABOVE', (0, -1), (-1, -1), 1.5, colors.black),
-        ('LINEBELOW', (0, -1), (-1, -1), 1.5, colors.black),
-        
-        # Общие настройки
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ]))
+    table.setStyle(_get_table_style())
     
     story.append(table)
     
-    story.append(Spacer(1, 8*mm))
-    
-    # ==================== УСЛОВИЯ ====================
-    
-    story.append(Paragraph(
-        "<b>Условия поставки:</b>",
-        style_normal
-    ))
-    
-    story.append(Spacer(1, 2*mm))
-    
-    conditions = [
-        "• Срок изготовления: 5-7 рабочих дней с момента поступления оплаты",
-        "• Форма оплаты: безналичный расчёт (100% предоплата)",
-        "• Доставка: рассчитывается отдельно в зависимости от адреса и объёма",
-        "• Разгрузка: силами и средствами заказчика",
-        "• Срок действия предложения: 14 календарных дней"
-    ]
-    
-    for condition in conditions:
-        story.append(Paragraph(condition, style_small))
-    
-    story.append(Spacer(1, 5*mm))
-    
-    # ==================== БАНКОВСКИЕ РЕКВИЗИТЫ ====================
-    
-    story.append(Paragraph(
-        "<b>Банковские реквизиты:</b>",
-        style_normal
-    ))
-    
-    story.append(Spacer(1, 2*mm))
-    
-    bank_details = [
-        f"Получатель: {COMPANY_NAME}",
-        f"ИНН {COMPANY_INN}, КПП {COMPANY_KPP}",
-        f"Расчётный счёт: {BANK_ACCOUNT}",
-        f"Банк: {BANK_NAME}",
-        f"БИК: {BANK_BIK}",
-        f"Корр. счёт: {BANK_CORR_ACCOUNT}"
-    ]
-    
-    for detail in bank_details:
-        story.append(Paragraph(detail, style_small))
-    
-    story.append(Spacer(1, 10*mm))
-    
-    # ==================== ПОДПИСЬ ====================
-    
-    story.append(Paragraph(
-        "С уважением,<br/>"
-        f"Отдел продаж {COMPANY_NAME}<br/>"
-        f"Тел.: {COMPANY_PHONE}<br/>"
-        f"E-mail: {COMPANY_EMAIL}",
-        style_normal
-    ))
+    # Условия, реквизиты и подпись не зависят от заказа
+    story.extend(_static_footer_flowables())
     
     # Генерируем PDF
     doc.build(story)
@@ -6,8 +6,10 @@
 - Глобальные списки плит
 - Парсинг текста пользователя
 """
+import math
 import os
 import re
+from bisect import bisect_right
 from typing import Any, Dict, List, Tuple
 
 # ==================== КОНСТАНТЫ ====================
@@ -25,49 +27,65 @@ PRICE_DB_PATH = os.path.join(BASE_DIR, 'pb.db')
 LONG_CUT_PRICE_PER_M = 460.0  # Продольный рез, руб/пог.м
 TRANSVERSE_CUT_PRICE = 1200.0  # Поперечный (или скошенный) рез, руб/шт
 
+# Параметры для примерного расчёта веса плиты
+SLAB_THICKNESS_M = 0.22  # Высота плиты, м
+CONCRETE_DENSITY_KG_M3 = 2400  # Плотность железобетона, кг/м³
+
 # ==================== ГЛОБАЛЬНЫЕ СПИСКИ ПЛИТ ====================
 
-# Данные из согласованного КЗ-плана
-# 1) Плиты 1.2 м — без резов (новый заказ)
-PLATES_1_2 = [3.39]*2
-
-# Дополнительные целевые ширины, которые получаем продольным резом из 1.2 м
-PLATES_1_08 = []         # нет 1.08 в этом заказе
-PLATES_0_46 = []         # нет 0.46 в этом заказе
-PLATES_0_32 = [6.63]*4 + [7.83]*3
-PLATES_0_72 = [5.63]*5
-PLATES_0_70 = [4.65]*5
-PLATES_0_86 = [6.75]*2 + [4.65]*5
-
-# Заказы на вторую половину (если пользователь прислал такие ширины)
-PLATES_0_74 = []
-PLATES_0_88 = []
-PLATES_0_48 = []
-PLATES_0_50 = []
-PLATES_0_34 = []
-
-# 2) Плиты 1.5 м — используем как 1.2 м (лента 0.3 образуется)
-PLATES_1_5_TO_1_2 = []
-# 3) Плиты 1.0 м — получаем из 1.2 (остаток 0.2 уходит в обрезки)
-PLATES_1_0 = []
+# Все списки плит (длины в метрах) хранятся в одном словаре по ключу ширины.
+# Старые имена модуля (cfg.PLATES_0_32 и т.п.) доступны через __getattr__ ниже.
+PLATES: Dict[str, List[float]] = {
+    # Данные из согласованного КЗ-плана
+    # 1) Плиты 1.2 м — без резов (новый заказ)
+    '1_2': [3.39]*2,
+
+    # Дополнительные целевые ширины, которые получаем продольным резом из 1.2 м
+    '1_08': [],         # нет 1.08 в этом заказе
+    '0_46': [],         # нет 0.46 в этом заказе
+    '0_32': [6.63]*4 + [7.83]*3,
+    '0_72': [5.63]*5,
+    '0_70': [4.65]*5,
+    '0_86': [6.75]*2 + [4.65]*5,
+
+    # Заказы на вторую половину (если пользователь прислал такие ширины)
+    '0_74': [],
+    '0_88': [],
+    '0_48': [],
+    '0_50': [],
+    '0_34': [],
+
+    # 2) Плиты 1.5 м — используем как 1.2 м (лента 0.3 образуется)
+    '1_5_TO_1_2': [],
+    # 3) Плиты 1.0 м — получаем из 1.2 (остаток 0.2 уходит в обрезки)
+    '1_0': [],
+}
+
+
+def __getattr__(name):
+    # Совместимость: PLATES_0_32 -> PLATES['0_32']
+    if name.startswith('PLATES_') and name[7:] in PLATES:
+        return PLATES[name[7:]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Резы по плану: по одному на каждую плиту, получаемую резом
 LONGITUDINAL_CUTS = (
-    len(PLATES_1_5_TO_1_2) + len(PLATES_1_0) +
-    len(PLATES_1_08) + len(PLATES_0_46) +
-    len(PLATES_0_32) + len(PLATES_0_72) + len(PLATES_0_70) + len(PLATES_0_86)
+    len(PLATES['1_5_TO_1_2']) + len(PLATES['1_0']) +
+    len(PLATES['1_08']) + len(PLATES['0_46']) +
+    len(PLATES['0_32']) + len(PLATES['0_72']) + len(PLATES['0_70']) + len(PLATES['0_86'])
 )
 LENGTH_TRIMS = 0
 
 # Остатки и отходы
 UNUSED_STRIPS_0_3_M_TOTAL = 0.0
 SCRAP_STRIPS_0_2_M_TOTAL = 0.0
-USABLE_STRIPS_0_74_M_TOTAL = round(sum(PLATES_0_46), 1)
-USABLE_STRIPS_0_88_M_TOTAL = round(sum(PLATES_0_32), 1)
-USABLE_STRIPS_0_48_M_TOTAL = round(sum(PLATES_0_72), 1)
-USABLE_STRIPS_0_50_M_TOTAL = round(sum(PLATES_0_70), 1)
-USABLE_STRIPS_0_34_M_TOTAL = round(sum(PLATES_0_86), 1)
-SCRAP_STRIPS_0_12_M_TOTAL = round(sum(PLATES_1_08), 1)
+USABLE_STRIPS_0_74_M_TOTAL = round(sum(PLATES['0_46']), 1)
+USABLE_STRIPS_0_88_M_TOTAL = round(sum(PLATES['0_32']), 1)
+USABLE_STRIPS_0_48_M_TOTAL = round(sum(PLATES['0_72']), 1)
+USABLE_STRIPS_0_50_M_TOTAL = round(sum(PLATES['0_70']), 1)
+USABLE_STRIPS_0_34_M_TOTAL = round(sum(PLATES['0_86']), 1)
+SCRAP_STRIPS_0_12_M_TOTAL = round(sum(PLATES['1_08']), 1)
 WASTE_AREA_M2 = round(0.12 * SCRAP_STRIPS_0_12_M_TOTAL, 2)
 
 # Метаданные плит для визуализации и смет
@@ -76,56 +94,73 @@ PLATE_METADATA: Dict[Tuple[float, int], List[Dict[str, Any]]] = {}
 
 # ==================== ФУНКЦИИ ПАРСИНГА ====================
 
+# Регулярные выражения парсера (компилируются один раз при импорте)
+_RE_SPLIT = re.compile(r'[\n;]+')
+_RE_WXL = re.compile(r'(\d+(?:\.\d+)?)\s*[xх]\s*(\d+(?:\.\d+)?)\D*(\d+)?')
+_RE_PB = re.compile(r'(?:плиты?\s*|\b)пб\s*([\d\.,]+)\s*-\s*([\d\.,]+)')
+_RE_QTY = re.compile(r'(\d+)\s*(шт)?\s*$')
+_RE_NAME_SIZES = re.compile(r'(\d+)-(\d+)')
+
+# Диапазоны ширин (м) → ключ в PLATES, отсортированы по нижней границе.
+# Границы включительные; строгое "больше" кодируется через math.nextafter.
+# Основные части — по таблице допустимых резов: 260-320, 460-530, 660-720, 860-920.
+# Остатки 0.48/0.50/0.88 перекрыты диапазонами 0.46 и 0.86 и в таблицу не входят.
+# Плиты 1.5 м обрабатываются отдельно в add_items.
+_WIDTH_BUCKETS = [
+    (0.26, 0.32, '0_32'),                      # 260-320 мм
+    (math.nextafter(0.33, 1), 0.35, '0_34'),   # ~340 мм (остаток от 860)
+    (0.46, 0.53, '0_46'),                      # 460-530 мм
+    (0.66, 0.71, '0_70'),                      # 660-710 мм
+    (math.nextafter(0.71, 1), 0.72, '0_72'),   # 710-720 мм
+    (math.nextafter(0.73, 1), 0.75, '0_74'),   # ~740 мм (остаток от 460)
+    (0.86, 0.92, '0_86'),                      # 860-920 мм
+    (0.98, 1.02, '1_0'),
+    (1.06, 1.12, '1_08'),
+    (1.15, 1.25, '1_2'),
+]
+_WIDTH_LOS = [lo for lo, _, _ in _WIDTH_BUCKETS]
+_WIDTH_HIS = [hi for _, hi, _ in _WIDTH_BUCKETS]
+_WIDTH_KEYS = [key for _, _, key in _WIDTH_BUCKETS]
+
+
 def _clear_all_plate_lists():
-    """Очищает все глобальные списки плит"""
-    global PLATES_1_2, PLATES_1_5_TO_1_2, PLATES_1_0, PLATES_1_08
-    global PLATES_0_46, PLATES_0_32, PLATES_0_72, PLATES_0_70, PLATES_0_86
-    global PLATES_0_74, PLATES_0_88, PLATES_0_48, PLATES_0_50, PLATES_0_34
-    PLATES_1_2 = []
-    PLATES_1_5_TO_1_2 = []
-    PLATES_1_0 = []
-    PLATES_1_08 = []
-    PLATES_0_46 = []
-    PLATES_0_32 = []
-    PLATES_0_72 = []
-    PLATES_0_70 = []
-    PLATES_0_86 = []
-    PLATES_0_74 = []
-    PLATES_0_88 = []
-    PLATES_0_48 = []
-    PLATES_0_50 = []
-    PLATES_0_34 = []
+    """Очищает все списки плит"""
+    # Новые списки, а не clear(): ссылки на прошлый разбор остаются нетронутыми
+    for key in PLATES:
+        PLATES[key] = []
+
+
+# Списки, плиты из которых получаются продольным резом (по резу на плиту)
+_CUT_LISTS = ('1_5_TO_1_2', '1_0', '1_08', '0_46', '0_32', '0_72', '0_70', '0_86')
+# Итог по остаткам → список плит, от которых он остаётся
+_STRIP_TOTALS = (
+    ('USABLE_STRIPS_0_74_M_TOTAL', '0_46'),
+    ('USABLE_STRIPS_0_88_M_TOTAL', '0_32'),
+    ('USABLE_STRIPS_0_48_M_TOTAL', '0_72'),
+    ('USABLE_STRIPS_0_50_M_TOTAL', '0_70'),
+    ('USABLE_STRIPS_0_34_M_TOTAL', '0_86'),
+    ('SCRAP_STRIPS_0_12_M_TOTAL', '1_08'),
+)
 
 
 def _recompute_totals_from_lists():
     """Пересчитывает глобальные итоговые переменные на основе списков плит"""
     global LONGITUDINAL_CUTS, LENGTH_TRIMS
     global UNUSED_STRIPS_0_3_M_TOTAL, SCRAP_STRIPS_0_2_M_TOTAL
-    global USABLE_STRIPS_0_74_M_TOTAL, USABLE_STRIPS_0_88_M_TOTAL
-    global USABLE_STRIPS_0_48_M_TOTAL, USABLE_STRIPS_0_50_M_TOTAL
-    global USABLE_STRIPS_0_34_M_TOTAL, SCRAP_STRIPS_0_12_M_TOTAL
     global WASTE_AREA_M2
 
-    LONGITUDINAL_CUTS = (
-        len(PLATES_1_5_TO_1_2) + len(PLATES_1_0) +
-        len(PLATES_1_08) + len(PLATES_0_46) +
-        len(PLATES_0_32) + len(PLATES_0_72) + len(PLATES_0_70) + len(PLATES_0_86)
-    )
+    LONGITUDINAL_CUTS = sum(len(PLATES[key]) for key in _CUT_LISTS)
     LENGTH_TRIMS = 0
 
     UNUSED_STRIPS_0_3_M_TOTAL = 0.0
     SCRAP_STRIPS_0_2_M_TOTAL = 0.0
-    USABLE_STRIPS_0_74_M_TOTAL = round(sum(PLATES_0_46), 1)
-    USABLE_STRIPS_0_88_M_TOTAL = round(sum(PLATES_0_32), 1)
-    USABLE_STRIPS_0_48_M_TOTAL = round(sum(PLATES_0_72), 1)
-    USABLE_STRIPS_0_50_M_TOTAL = round(sum(PLATES_0_70), 1)
-    USABLE_STRIPS_0_34_M_TOTAL = round(sum(PLATES_0_86), 1)
-    SCRAP_STRIPS_0_12_M_TOTAL = round(sum(PLATES_1_08), 1)
-    WASTE_AREA_M2 = round(0.12 * SCRAP_STRIPS_0_12_M_TOTAL, 2)
+    totals = {name: round(sum(PLATES[key]), 1) for name, key in _STRIP_TOTALS}
+    globals().update(totals)
+    WASTE_AREA_M2 = round(0.12 * totals['SCRAP_STRIPS_0_12_M_TOTAL'], 2)
 
 
 def set_plate_lists_from_text(user_text: str) -> None:
-    """Парсит свободный текст пользователя и заполняет списки PLATES_*.
+    """Парсит свободный текст пользователя и заполняет списки PLATES.
 
     Поддерживаем форматы:
       - "1.2×3.39 — 2 шт" / "0,32x6,63 - 4"
@@ -135,59 +170,31 @@ def set_plate_lists_from_text(user_text: str) -> None:
     _clear_all_plate_lists()
 
     text = (user_text or '').replace('\u00d7', 'x').replace('×', 'x')
-    lines = [l.strip() for l in re.split(r'[\n;]+', text) if l.strip()]
+    lines = [l.strip() for l in _RE_SPLIT.split(text) if l.strip()]
 
     def add_items(width_m: float, length_m: float, qty: int):
+        # Нулевое количество и ширины вне всех диапазонов (0.26–1.55 м) сразу отбрасываем
+        if qty <= 0 or not (0.26 <= width_m <= 1.55):
+            return
+        plates = (round(float(length_m), 2),) * qty
         # Специальная обработка плит 1.5 м → заменяем на 1.2 м + 0.3 м
         if 1.45 <= width_m <= 1.55:  # 1.5 м (диапазон ±50 мм)
             # Добавляем плиту 1.2 м
-            for _ in range(max(0, qty)):
-                PLATES_1_2.append(round(float(length_m), 2))
-            # Добавляем плиту 0.3 м (записываем в PLATES_0_32)
-            for _ in range(max(0, qty)):
-                PLATES_0_32.append(round(float(length_m), 2))
+            PLATES['1_2'].extend(plates)
+            # Добавляем плиту 0.3 м (записываем в PLATES['0_32'])
+            PLATES['0_32'].extend(plates)
             return
         
-        target = None
-        if 1.15 <= width_m <= 1.25:
-            target = PLATES_1_2
-        elif 0.98 <= width_m <= 1.02:
-            target = PLATES_1_0
-        elif 1.06 <= width_m <= 1.12:
-            target = PLATES_1_08
-        # Основные части (по таблице допустимых резов: 260-320, 460-530, 660-720, 860-920):
-        elif 0.26 <= width_m <= 0.32:    # 260-320 мм
-            target = PLATES_0_32
-        elif 0.46 <= width_m <= 0.53:    # 460-530 мм
-            target = PLATES_0_46
-        elif 0.66 <= width_m <= 0.71:    # 660-710 мм → PLATES_0_70
-            target = PLATES_0_70
-        elif 0.71 < width_m <= 0.72:     # 710-720 мм → PLATES_0_72
-            target = PLATES_0_72
-        elif 0.86 <= width_m <= 0.92:    # 860-920 мм
-            target = PLATES_0_86
-        # Остатки (если пользователь явно указал остаточные ширины):
-        # Примечание: остатки обычно создаются автоматически оптимизатором
-        elif 0.33 < width_m <= 0.35:     # ~340 мм (остаток от 860)
-            target = PLATES_0_34
-        elif 0.47 < width_m <= 0.49:     # ~480 мм (остаток от 720)
-            target = PLATES_0_48
-        elif 0.49 < width_m <= 0.51:     # ~500 мм (остаток от 700)
-            target = PLATES_0_50
-        elif 0.73 < width_m <= 0.75:     # ~740 мм (остаток от 460)
-            target = PLATES_0_74
-        elif 0.87 < width_m <= 0.89:     # ~880 мм (остаток от 320)
-            target = PLATES_0_88
-        else:
+        i = bisect_right(_WIDTH_LOS, width_m) - 1
+        if i < 0 or width_m > _WIDTH_HIS[i]:
             return
-        for _ in range(max(0, qty)):
-            target.append(round(float(length_m), 2))
+        PLATES[_WIDTH_KEYS[i]].extend(plates)
 
     for raw in lines:
         s = raw.lower()
         # 1) формат WxL x qty (поддерживает запятую и точку)
         s_norm = s.replace(',', '.')
-        m = re.search(r'(\d+(?:\.\d+)?)\s*[xх]\s*(\d+(?:\.\d+)?)\D*(\d+)?', s)
+        m = _RE_WXL.search(s)
         if m:
             w = float(m.group(1).replace(',', '.'))
             L = float(m.group(2).replace(',', '.'))
@@ -195,9 +202,7 @@ def set_plate_lists_from_text(user_text: str) -> None:
             add_items(w, L, q)
             continue
         # 2) формат "Плиты ПБ 78,3-3,2-8п 3" или "ПБ 78-12-8п 10"
-        m2 = re.search(r'плиты?\s*пб\s*([\d\.,]+)\s*-\s*([\d\.,]+)', s)
-        if not m2:
-            m2 = re.search(r'\bпб\s*([\d\.,]+)\s*-\s*([\d\.,]+)', s)
+        m2 = _RE_PB.search(s)
         if m2:
             Ldm_str = m2.group(1).replace(' ', '').replace(',', '.')
             Wdm_str = m2.group(2).replace(' ', '').replace(',', '.')
@@ -213,7 +218,7 @@ def set_plate_lists_from_text(user_text: str) -> None:
                 continue
             q = 1
             # Количество — последнее число в строке
-            mq = re.search(r'(\d+)\s*(шт)?\s*$', s)
+            mq = _RE_QTY.search(s)
             if mq:
                 try:
                     q = int(mq.group(1))
@@ -239,16 +244,16 @@ def make_plate_name(length_m: float, width_m: float, reinforcement: str = '8п')
 
 def parse_name_to_sizes(name: str) -> tuple:
     """Достаёт (length_m, width_m) из строки прайса."""
-    m = re.search(r'(\d+)-(\d+)', name.replace(',', '.'))
+    m = _RE_NAME_SIZES.search(name.replace(',', '.'))
     if not m:
         return None, None
     return float(m.group(1)) / 10.0, float(m.group(2)) / 10.0
 
 
-def approximate_weight_kg(length_m: float, width_m: float, thickness_m: float = 0.22) -> float:
+def approximate_weight_kg(length_m: float, width_m: float, thickness_m: float = SLAB_THICKNESS_M) -> float:
     """Примерный расчёт веса плиты в килограммах"""
     volume = length_m * width_m * thickness_m
-    return round(volume * 2400, 1)
+    return round(volume * CONCRETE_DENSITY_KG_M3, 1)
 
 
 def register_plate_metadata(plates: List[Dict[str, Any]]) -> None:
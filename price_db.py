@@ -1,4 +1,5 @@
 import os
+import re
 import sqlite3
 from typing import Dict, Optional
 
@@ -10,6 +11,9 @@ except Exception:
 
 DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pb.db')
 
+# Размеры в наименовании позиции прайса: "ПБ 17-12" -> длина 17 дм, ширина 12 дм
+_NAME_SIZE_RE = re.compile(r'(\d+)\s*-\s*(\d+)')
+
 
 def init_schema(db_path: str = DEFAULT_DB) -> None:
     conn = sqlite3.connect(db_path)
@@ -18,6 +22,11 @@ def init_schema(db_path: str = DEFAULT_DB) -> None:
         cur.execute(
             'CREATE TABLE IF NOT EXISTS prices (length_dm INTEGER, load_code INTEGER, price REAL, PRIMARY KEY(length_dm, load_code))'
         )
+        # Покрывающий индекс: поиск цены по (length_dm, load_code) обходится без чтения строки таблицы.
+        # После создания индекса на существующей базе стоит один раз выполнить ANALYZE prices;
+        cur.execute(
+            'CREATE INDEX IF NOT EXISTS idx_prices_lookup ON prices(length_dm, load_code, price)'
+        )
         conn.commit()
     finally:
         conn.close()
@@ -77,16 +86,18 @@ def import_from_xlsx(xlsx_path: str, db_path: str = DEFAULT_DB, preferred_sheet:
             data_df = df
         if not headers:
             continue
-        for _, row in data_df.iterrows():
-            name = str(row.get(name_col, '')).strip()
-            m = None
-            import re
-            m = re.search(r'(\d+)\s*-\s*(\d+)', name)
-            if not m:
-                continue
-            length_dm = int(m.group(1))
-            for load_code, col in headers.items():
-                val = row.get(col)
+        # Длину в дм из наименования ("ПБ 17-12" -> 17) извлекаем сразу для всего столбца;
+        # строки без размера в наименовании отбрасываем маской
+        lengths = data_df[name_col].astype(str).str.extract(_NAME_SIZE_RE)[0]
+        has_size = lengths.notna()
+        # Строки - простыми кортежами (itertuples), без построения Series на каждую строку
+        load_codes = list(headers)
+        columns = [headers[code] for code in load_codes]
+        for length_dm, values in zip(
+            lengths[has_size].astype(int),
+            data_df.loc[has_size, columns].itertuples(index=False, name=None)
+        ):
+            for load_code, val in zip(load_codes, values):
                 if pd.notna(val):
                     try:
                         price = float(str(val).replace(' ', '').replace(',', '.'))
@@ -11,6 +11,7 @@ import os
 import re
 import sqlite3
 from datetime import datetime
+import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
@@ -20,6 +21,7 @@ from matplotlib.lines import Line2D
 import config_and_data as cfg
 from optimization import OPT_PLAN, OPT_WIDTH_PRIORITY, optimize_cuts_pulp
 from price_db import init_schema, import_from_xlsx, get_price
+from commercial_offer import clear_price_cache
 
 try:
     import pandas as pd
@@ -34,6 +36,11 @@ except Exception:
 
 # ==================== РАБОТА С ЦЕНАМИ ====================
 
+# Распознавание колонок прайса по заголовку: "8 нагрузка", "цена 8", "8 руб"
+_RE_LOAD_COL = re.compile(r'(\d+)\s*нагруз')
+_RE_PRICE_LOAD_COL = re.compile(r'(?:цен|руб|стоим)[^\d]{0,10}(6|8|10|12)\b')
+_RE_LOAD_PRICE_COL = re.compile(r'\b(6|8|10|12)[^\d]{0,10}(?:цен|руб|стоим)')
+
 def load_price_table_from_xlsx(path: str):
     """Загружает таблицу цен вида: ключ length_dm -> {6:price,8:price,10:price,12:price}."""
     table = {}
@@ -116,13 +123,13 @@ def load_price_table_from_xlsx(path: str):
             simple_price_col = next((c for c in df.columns if any(k in str(c).lower() for k in ['цен', 'руб', 'стоим'])), None)
             for c in df.columns:
                 cl = str(c).lower()
-                m = re.search(r'(\d+)\s*нагруз', cl)
+                m = _RE_LOAD_COL.search(cl)
                 if m:
                     load_cols[int(m.group(1))] = c
                     continue
-                m2 = re.search(r'(?:цен|руб|стоим)[^\d]{0,10}(6|8|10|12)\b', cl)
+                m2 = _RE_PRICE_LOAD_COL.search(cl)
                 if not m2:
-                    m2 = re.search(r'\b(6|8|10|12)[^\d]{0,10}(?:цен|руб|стоим)', cl)
+                    m2 = _RE_LOAD_PRICE_COL.search(cl)
                 if m2:
                     try:
                         load_cols[int(m2.group(1))] = c
@@ -187,6 +194,7 @@ def sync_price_xlsx_to_db(xlsx_path: str = cfg.PRICE_XLSX_PATH, db_path: str = c
         cur.execute('CREATE TABLE IF NOT EXISTS prices (length_dm INTEGER, load_code INTEGER, price REAL, PRIMARY KEY(length_dm, load_code))')
         cur.executemany('INSERT OR REPLACE INTO prices (length_dm, load_code, price) VALUES (?,?,?)', rows)
         conn.commit()
+        clear_price_cache()
         return len(rows)
     finally:
         conn.close()
@@ -397,10 +405,14 @@ def build_procurement_items():
 def build_price_rows(price_table: dict, reinforcement_code: int = 8):
     """Формирует строки сметы."""
     items = build_procurement_items()
+    # Вес всех позиций - одним векторным выражением по формуле cfg.approximate_weight_kg
+    n = len(items)
+    lengths = np.fromiter((it['length'] for it in items), dtype=float, count=n)
+    widths = np.fromiter((it['width'] for it in items), dtype=float, count=n)
+    weights = np.round(lengths * widths * cfg.SLAB_THICKNESS_M * cfg.CONCRETE_DENSITY_KG_M3, 1)
     rows = []
     total = 0.0
-    idx = 1
-    for it in items:
+    for i, it in enumerate(items):
         L, W, qty = it['length'], it['width'], it['qty']
         long_cuts, trans_cuts = it['long_cuts'], it['trans_cuts']
         name = cfg.make_plate_name(L, W)
@@ -417,7 +429,7 @@ def build_price_rows(price_table: dict, reinforcement_code: int = 8):
         
         cuts_cost = long_cuts * (cfg.LONG_CUT_PRICE_PER_M * L) + trans_cuts * cfg.TRANSVERSE_CUT_PRICE
         unit_price = base_price + cuts_cost
-        weight = cfg.approximate_weight_kg(L, W)
+        weight = weights[i]
         row_sum = unit_price * qty
         total += row_sum
 
@@ -433,7 +445,7 @@ def build_price_rows(price_table: dict, reinforcement_code: int = 8):
         contractor_str = ", ".join(sorted(set(contractors))) if contractors else ''
 
         rows.append([
-            idx,
+            i + 1,
             name,
             qty,
             'шт',
@@ -443,7 +455,6 @@ def build_price_rows(price_table: dict, reinforcement_code: int = 8):
             f'{unit_price:,.2f}'.replace(',', ' ').replace('.', ','),
             f'{row_sum:,.2f}'.replace(',', ' ').replace('.', ',')
         ])
-        idx += 1
     return rows, total
 
 
@@ -902,7 +913,10 @@ def _draw_transverse_cut(ax, x0: float, total_length: float, target_length: floa
 # ==================== ГЛАВНАЯ ФУНКЦИЯ ВИЗУАЛИЗАЦИИ ====================
 
 def visualize_plan(output_dir: str = 'Визуализация_Раскладки'):
-    """Создаёт визуализацию раскладки плит и сохраняет файлы"""
+    """Создаёт визуализацию раскладки плит и сохраняет файлы.
+
+    Возвращает (png_path, pdf_path, timestamp).
+    """
     try:
         optimized = optimize_cuts_pulp({300: 4, 500: 3, 700: 2, 900: 2})
         print("Оптимальные резы:", optimized)
@@ -916,6 +930,8 @@ def visualize_plan(output_dir: str = 'Визуализация_Раскладк
         init_schema(cfg.PRICE_DB_PATH)
         written = import_from_xlsx(cfg.PRICE_XLSX_PATH, cfg.PRICE_DB_PATH)
         if written:
+            # Цены в базе обновились - кэш цен КП больше не актуален
+            clear_price_cache()
             print(f'[ПРАЙС->БД] записано строк: {written}')
     except Exception:
         pass
@@ -1188,7 +1204,8 @@ def visualize_plan(output_dir: str = 'Визуализация_Раскладк
     if pd is not None:
         print('  XLSX (ведомость):', os.path.join(output_dir, f'Ведомость_Дорожка_1_{timestamp}.xlsx'))
         print('  XLSX (смета):', os.path.join(output_dir, f'Смета_Дорожка_1_{timestamp}.xlsx'))
-    return png_path, pdf_path
+    # timestamp возвращаем отдельно: по нему строятся имена ведомости и сметы
+    return png_path, pdf_path, timestamp
 
 
 if __name__ == '__main__':